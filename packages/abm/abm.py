@@ -1,5 +1,23 @@
+import heapq
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from packages.abm.agent import Agent
 from packages.abm.agent_generator import AgentGenerator
 from packages.abm.agent_mover import AgentMover
+from packages.abm.counts import Counts, CountsRow
+from packages.abm.occupancy_grid import OccupancyGrid
+from packages.abm.progression_schedule import ProgressionSchedule
+from packages.abm.rng import BlockRNG, spawn_streams, stream_names
+
+
+# state of a model after a time step: step is the number of time steps run so far, counts is a CountsRow of the metrics
+# after the step, and changed lists the status changes made during the step if they were tracked, or None
+StepSnapshot = namedtuple('StepSnapshot', ['step', 'counts', 'changed'])
 
 
 class ABM:
@@ -11,7 +29,22 @@ class ABM:
 
         agents:          a list of Agents currently alive in the model
 
-        counts:          a list of dictionaries, where each dictionary represents the metrics gathered for a single time step
+        baseline_counted: True once the baseline metrics have been counted and the initial state yielded by
+                         iter_steps, which happens only once even if no steps are run
+
+        counts:          Counts buffer holding the metrics gathered for each time step, one row per time step; each row
+                         can be read as a dictionary of status to count
+
+        current_step:    the number of time steps run so far
+
+        grid:            OccupancyGrid indexing which Agent occupies each position; rebuilt whenever agents is assigned
+
+        order:           dictionary mapping each Agent to its index in agents when agents was assigned, which gives the
+                         order in which Agents are updated; built when first needed
+
+        movement:        how Agents are moved in each time step: 'sequential' moves Agents one at a time in list order,
+                         'checkerboard' moves Agents in batches of color classes (see
+                         AgentMover.move_all_agents_checkerboard)
 
         num_dead:        the number of Agents which have died and have been removed from the model by the current time step
 
@@ -21,12 +54,41 @@ class ABM:
 
         num_susceptible: the number of Agents which have a susceptible status in the current time step
 
+        progression:     how Agents are updated in each time step: 'sweep' updates every Agent with
+                         Agent.update_agent and checks every infected Agent for death with Agent.has_died;
+                         'scheduled' checks only the frontier of susceptible Agents next to an infected Agent for
+                         infection, and changes the status of infected Agents when their death, quarantine or recovery
+                         event in schedule is due. Both give the same distribution of results. In 'scheduled' mode,
+                         Agent.days_infected is brought up to date from the schedule whenever agents is read; see
+                         get_days_infected()
+
+        profiler:        optional Profiler which collects the time spent in each phase of each time step, and counters
+                         from AgentMover; None to run without instrumentation
+
+        removed:         set of Agents which have died but have not yet been compacted out of agents
+
+        rngs:            dictionary of independent BlockRNG streams derived from the seed, one for each of generation,
+                         placement, progression (used by Agents) and movement
+
+        schedule:        ProgressionSchedule of the infected Agents in 'scheduled' mode, built when first needed; None
+                         otherwise
+
        status_colors:    defines the colors used for Agent statuses while debugging
+
+       count_statuses:   the order of the status columns in counts
+
+       movement_modes:   the allowed values of movement
+
+       progression_modes: the allowed values of progression
     """
 
     status_colors = {'R': 'r', 'S': 'b', 'I': 'g', 'Q': 'k', 'D': 'm'}
+    count_statuses = Counts.statuses
+    movement_modes = ['sequential', 'checkerboard']
+    progression_modes = ['sweep', 'scheduled']
 
-    def __init__(self, n, m, num_infected, percent_distancing, percent_mask, percent_vaccinated=0.0):
+    def __init__(self, n, m, num_infected, percent_distancing, percent_mask, percent_vaccinated=0.0, seed=None,
+                 movement='sequential', profiler=None, progression='scheduled'):
         """
 
         :param n: the dimension of the square torus grid used to define the world in which Agents move
@@ -35,30 +97,98 @@ class ABM:
         :param percent_distancing: the percent of Agents which have a quarantine status upon initialization
         :param percent_mask: the percent of Agents which are masked upon initialization
         :param percent_vaccinated: the percent of Agents which have a recovered status upon initialization
+        :param seed: int or numpy.random.SeedSequence from which every random stream is derived; the same seed gives
+        identical counts. None for fresh entropy.
+        :param movement: 'sequential' or 'checkerboard'
+        :param profiler: Optional Profiler; see profiler field
+        :param progression: 'sweep' or 'scheduled'
         """
         self.n = n
         self.m = m
+        self.movement = movement
+        self.profiler = profiler
+        self.progression = progression
 
         # validate
         if m > n * n:
             raise ValueError('n x n grid cannot hold all agents')
+        if movement not in self.movement_modes:
+            raise ValueError('movement must be one of ' + str(self.movement_modes))
+        if progression not in self.progression_modes:
+            raise ValueError('progression must be one of ' + str(self.progression_modes))
+
+        self.rngs = spawn_streams(seed)
+        self.schedule = None
 
         # generate agents
-        ag = AgentGenerator(self.m, num_infected, percent_distancing, percent_mask, percent_vaccinated)
-        self.agents = ag.generate_agents()
+        start = time.perf_counter()
+        ag = AgentGenerator(self.m, num_infected, percent_distancing, percent_mask, percent_vaccinated,
+                            self.rngs['generation'], self.rngs['progression'])
+        agents = ag.generate_agents()
 
         # position agents
-        am = AgentMover(self.n)
-        am.position_agents(self.agents)
+        generated = time.perf_counter()
+        am = AgentMover(self.n, rng=self.rngs['placement'], profiler=profiler)
+        am.position_agents(agents)
+        self.agents = agents  # builds occupancy grid
+
+        if profiler is not None:
+            profiler.add_time('generation', generated - start)
+            profiler.add_time('placement', time.perf_counter() - generated)
 
         # set baseline metrics
-        self.counts = []
+        self.counts = Counts()
+        self.current_step = 0
+        self.baseline_counted = False
         self.num_recovered = 0
         self.num_infected = 0
         self.num_susceptible = 0
         self.num_dead = 0
         self.num_quarantine = 0
 
+    @property
+    def agents(self):
+        """
+        :return: List of Agents currently alive in the model, with days_infected up to date.
+        """
+        if self.removed:
+            self.compact_agents()
+
+        if self.schedule is not None:
+            for agent in self.schedule.infection_steps:
+                agent.days_infected = self.get_days_infected(agent)
+
+        return self._agents
+
+    @agents.setter
+    def agents(self, agents):
+        """
+        Replaces the Agents in the model and rebuilds the occupancy grid from their positions. In 'scheduled' mode,
+        Agents already in the schedule keep their infection and death steps; other infected Agents are scheduled from
+        their days_infected.
+        :param agents: List of positioned Agents
+        :return: None
+        """
+        schedule = self.schedule
+
+        self._agents = agents
+        self.removed = set()
+        self.grid = OccupancyGrid(self.n, agents)
+        self.schedule = None
+        self.order = None
+
+        if schedule is not None:
+            death_steps = []
+            for agent in agents:
+                if agent in schedule.infection_steps:
+                    agent.days_infected = schedule.get_days_infected(agent, self.current_step)
+                    death_steps.append(schedule.get_death_step(agent))
+                else:
+                    death_steps.append(None)  # drawn
+
+            self.schedule = ProgressionSchedule.from_agents(agents, self.current_step, self.rngs['progression'],
+                                                            death_steps)
+
     def count_baseline_metrics(self):
         """
         Counts current values for baseline metrics.
@@ -106,75 +236,501 @@ class ABM:
 
     def remove_agent(self, agent):
         """
-        Remove agent from simulation if agent has died and increments num_dead by 1.
+        Remove agent from simulation if agent has died, moving it from the count of its status to num_dead.
+
+        The agent is removed from the grid immediately and marked as removed in O(1) time. The list of agents is not
+        modified until compact_agents() is called, so removing agents while iterating over the list is safe. In
+        'scheduled' mode, the agent is also dropped from the schedule, so its pending events are ignored.
         :param agent: Agent that died
         :return: None
         """
-        self.agents.remove(agent)
+        if self.grid.get_agent(agent.position) is not agent:
+            return  # already removed
+
+        self.removed.add(agent)
+        self.grid.remove_agent(agent)
+        if self.schedule is not None:
+            self.schedule.remove_agent(agent)
+        self.update_baseline_metrics(agent.status, 'D')
         self.num_dead += 1
 
+    def compact_agents(self):
+        """
+        Drops all removed Agents from the list of agents in a single pass.
+        :return: None
+        """
+        if not self.removed:
+            return
+
+        self._agents = [agent for agent in self._agents if agent not in self.removed]
+        self.removed = set()
+
+    def get_count_values(self):
+        """
+        :return: Tuple of the current metrics, in the column order of count_statuses.
+        """
+        return (self.num_recovered, self.num_dead, self.num_infected, self.num_susceptible, self.num_quarantine)
+
     def add_counts(self):
         """
-        Generates a dictionary of the current metrics and adds the dictionary to the list of counts.
+        Adds a row of the current metrics to counts, in the column order of count_statuses.
         :return: None
         """
-        counts = {'R': self.num_recovered, 'D': self.num_dead, 'I': self.num_infected, 'S': self.num_susceptible,
-                  'Q': self.num_quarantine}
-        self.counts.append(counts)
+        self.counts.append(self.get_count_values())
+
+    def get_snapshot(self, changed=None):
+        """
+        Captures the current step and metrics of the model.
+        :param changed: List of status changes made during the step, or None if changes were not tracked
+        :return: StepSnapshot
+        """
+        return StepSnapshot(self.current_step, CountsRow(np.array(self.get_count_values(), dtype=Counts.dtype)),
+                            changed)
 
     def get_adj_agents(self, agent):
         """
-        Determines which Agents are within 1 position of this Agent.
+        Determines which Agents are within 1 position of this Agent. Only the 8 surrounding positions are checked in the
+        occupancy grid, so the cost does not depend on the number of Agents in the model.
         :param agent: Agent under consideration
         :return: List of Agents within 1 position of this Agent
         """
+        positions = self.grid.get_adj_positions(agent.position)
+
+        return self.grid.get_agents(positions)
+
+    def iter_steps(self, num_steps, track_changes=False):
+        """
+        Runs simulation for specified number of time steps, yielding a snapshot of the metrics after each step. On the
+        first call, the baseline metrics are counted and a snapshot of the initial state is yielded first, even if
+        num_steps is 0; later calls continue from the last step (see baseline_counted). Nothing is stored in counts, so
+        callers can stream results elsewhere or stop early; the model is left in a consistent state after every
+        snapshot.
 
-        nearby = []
+        :param num_steps: Number of time steps to run the model
+        :param track_changes: If True, each snapshot lists (Agent, status before, status after) for every Agent whose
+        status changed during the step, with status after 'D' for Agents which died.
+        :return: Generator of StepSnapshot.
+        """
+        am = AgentMover(self.n, self.grid, self.rngs['movement'], self.profiler)
+        move_all_agents = am.move_all_agents_checkerboard if self.movement == 'checkerboard' else am.move_all_agents
+
+        if not self.baseline_counted:
+            self.num_recovered = 0
+            self.num_infected = 0
+            self.num_susceptible = 0
+            self.num_quarantine = 0
+            self.count_baseline_metrics()
+            self.baseline_counted = True
+            yield self.get_snapshot([] if track_changes else None)
 
-        am = AgentMover(self.n)
-        positions = am.get_adj_positions(agent.position)
+        # update agents and metrics for each time step
+        for t in range(num_steps):
+            changed = [] if track_changes else None
 
-        for each in self.agents:
-            if each.position in positions:
-                nearby.append(each)  # found one
+            # Agents draw from the provider shared by every Agent, so it is set to this model's stream for the step
+            shared_rng = Agent.rng
+            Agent.rng = self.rngs['progression']
+            try:
+                if self.profiler is None:
+                    self.update_agents(changed)
 
-        return nearby
+                    # drop dead agents once per step
+                    self.compact_agents()
 
-    def run_simulation(self, num_steps):
+                    # move all agents
+                    move_all_agents(self._agents)
+                else:
+                    self.profile_step(move_all_agents, changed)
+            finally:
+                Agent.rng = shared_rng
+
+            self.current_step += 1
+            yield self.get_snapshot(changed)
+
+    def update_agents(self, changed=None):
+        """
+        Performs the death check and status update of every Agent for one time step, using the progression mode of the
+        model.
+        :param changed: Optional list to which (Agent, status before, status after) is added for every status change
+        :return: None
+        """
+        if self.progression == 'scheduled':
+            self.update_agents_scheduled(changed)
+        else:
+            self.update_agents_sweep(changed)
+
+    def update_agents_sweep(self, changed=None):
+        """
+        Performs the death check for every Agent, removing Agents which die, and updates every surviving Agent and the
+        metrics. Deaths are only marked during the loop, so every living Agent is updated exactly once.
+
+        If a profiler is set, the death checks, neighbor queries, Agent updates and metric updates are timed as separate
+        phases, and neighbor queries are counted.
+        :param changed: Optional list to which (Agent, status before, status after) is added for every status change
+        :return: None
+        """
+        track_changes = changed is not None
+        profiler = self.profiler
+        clock = time.perf_counter
+        if profiler is not None:
+            death_time = adj_time = update_time = metrics_time = 0.0
+            num_queries = 0
+
+        for agent in self._agents:
+            if profiler is not None:
+                start = clock()
+            died = agent.has_died()
+            if profiler is not None:
+                checked = clock()
+                death_time += checked - start
+
+            if died:
+                self.remove_agent(agent)
+                if track_changes:
+                    changed.append((agent, agent.status, 'D'))
+                if profiler is not None:
+                    metrics_time += clock() - checked
+            else:
+                adj = self.get_adj_agents(agent)
+                if profiler is not None:
+                    queried = clock()
+                    num_queries += 1
+                before = agent.status
+                agent.update_agent(adj)
+                if profiler is not None:
+                    updated = clock()
+                after = agent.status
+                self.update_baseline_metrics(before, after)
+                if track_changes and before != after:
+                    changed.append((agent, before, after))
+                if profiler is not None:
+                    adj_time += queried - checked
+                    update_time += updated - queried
+                    metrics_time += clock() - updated
+
+        if profiler is not None:
+            profiler.add_time('death_check', death_time)
+            profiler.add_time('neighbor_query', adj_time)
+            profiler.add_time('update_agent', update_time)
+            profiler.add_time('metrics', metrics_time)
+            profiler.count('neighbor_queries', num_queries)
+            profiler.count('neighbor_checks', num_queries * len(AgentMover.directions))
+
+    def update_agents_scheduled(self, changed=None):
+        """
+        Performs the same updates as update_agents_sweep, in the same order, but only for Agents whose status can
+        change: Agents with an event due in the schedule, and the frontier of susceptible Agents next to an infected
+        Agent (see get_frontier). These Agents are taken in list order from a heap of their indexes. When an Agent is
+        infected, its susceptible neighbors later in the list join the heap, as they would see it as infected in
+        update_agents_sweep. Newly infected Agents have their death, quarantine and recovery scheduled, so no random
+        draws are made for them after infection.
+
+        If a profiler is set, the frontier build, neighbor queries, infection checks, scheduled events and metric
+        updates are timed as separate phases, and neighbor queries are counted.
+        :param changed: Optional list to which (Agent, status before, status after) is added for every status change
+        :return: None
+        """
+        profiler = self.profiler
+        clock = time.perf_counter
+        if profiler is not None:
+            start = clock()
+
+        if self.schedule is None:
+            self.schedule = ProgressionSchedule.from_agents(self._agents, self.current_step, self.rngs['progression'])
+        if self.order is None:
+            self.order = {agent: i for i, agent in enumerate(self._agents)}
+
+        track_changes = changed is not None
+        schedule = self.schedule
+        order = self.order
+        step = self.current_step + 1
+
+        # agents to update, by index; the frontier includes Agents which are infectious until they recover this step
+        active = {order[agent]: agent for agent in self.get_frontier()}
+        events = schedule.pop_events(step)
+        for agent in events:
+            active[order[agent]] = agent
+
+        heap = list(active)
+        heapq.heapify(heap)
+
+        if profiler is not None:
+            profiler.add_time('frontier', clock() - start)
+            adj_time = infection_time = event_time = metrics_time = 0.0
+            num_queries = 0
+
+        while heap:
+            i = heapq.heappop(heap)
+            agent = active[i]
+            before = agent.status
+            if profiler is not None:
+                started = clock()
+
+            if before == 'S':
+                adj = self.get_adj_agents(agent)
+                if profiler is not None:
+                    queried = clock()
+                    adj_time += queried - started
+                    num_queries += 1
+
+                if agent.is_infected(adj):
+                    agent.status = 'I'
+                    agent.asymptomatic = agent.is_asymptomatic()
+                    schedule.add_infection(agent, step)
+
+                    # grow the frontier within this step
+                    for neighbor in adj:
+                        j = order[neighbor]
+                        if j > i and neighbor.status == 'S' and j not in active:
+                            active[j] = neighbor
+                            heapq.heappush(heap, j)
+
+                if profiler is not None:
+                    infection_time += clock() - queried
+
+            else:
+                after = events[agent]
+                if after == 'D':
+                    self.remove_agent(agent)
+                    if track_changes:
+                        changed.append((agent, before, 'D'))
+                    if profiler is not None:
+                        event_time += clock() - started
+                    continue
+
+                agent.status = after
+                if after == 'R':
+                    agent.days_infected = 0
+                    agent.asymptomatic = False
+                if profiler is not None:
+                    event_time += clock() - started
+
+            after = agent.status
+            if before != after:
+                if profiler is not None:
+                    updated = clock()
+                self.update_baseline_metrics(before, after)
+                if track_changes:
+                    changed.append((agent, before, after))
+                if profiler is not None:
+                    metrics_time += clock() - updated
+
+        if profiler is not None:
+            profiler.add_time('neighbor_query', adj_time)
+            profiler.add_time('infection', infection_time)
+            profiler.add_time('events', event_time)
+            profiler.add_time('metrics', metrics_time)
+            profiler.count('neighbor_queries', num_queries)
+            profiler.count('neighbor_checks', num_queries * len(AgentMover.directions))
+
+    def get_frontier(self):
+        """
+        Finds the susceptible Agents which are next to at least one infected Agent, which are the only Agents that can
+        be infected. The frontier is found from the infected Agents in the schedule at the start of each time step, as
+        every Agent moves between steps.
+        :return: Set of Agents.
+        """
+        frontier = set()
+        num_queries = 0
+        for agent in self.schedule.infection_steps:
+            if agent.status == 'I':
+                num_queries += 1
+                for adjacent in self.get_adj_agents(agent):
+                    if adjacent.status == 'S':
+                        frontier.add(adjacent)
+
+        if self.profiler is not None:
+            self.profiler.count('neighbor_queries', num_queries)
+            self.profiler.count('neighbor_checks', num_queries * len(AgentMover.directions))
+
+        return frontier
+
+    def get_days_infected(self, agent):
+        """
+        :param agent: Agent in the model
+        :return: How long agent has been infected, or 0 if it is not infected or quarantined.
+        """
+        if self.progression == 'scheduled' and self.schedule is not None:
+            return self.schedule.get_days_infected(agent, self.current_step)
+
+        return agent.days_infected
+
+    def profile_step(self, move_all_agents, changed=None):
+        """
+        Performs the same time step as iter_steps, timing each phase with the profiler. In 'sweep' mode the phases are
+        death check, neighbor query, update_agent and metric updates for each Agent; in 'scheduled' mode, they are the
+        frontier build, neighbor query, infection checks, scheduled events and metric updates (see
+        update_agents_scheduled). The updates are timed by update_agents_sweep and update_agents_scheduled themselves,
+        so profiled and unprofiled steps share the same code. Both are followed by compaction of the list of Agents and
+        movement. Timing every Agent adds overhead, so this is only used when a profiler is set.
+        :param move_all_agents: function(agents) which moves the Agents
+        :param changed: Optional list to which (Agent, status before, status after) is added for every status change
+        :return: None
+        """
+        profiler = self.profiler
+        clock = time.perf_counter
+
+        self.update_agents(changed)
+        start = clock()
+        self.compact_agents()
+        compacted = clock()
+        move_all_agents(self._agents)
+        moved = clock()
+
+        profiler.add_time('compaction', compacted - start)
+        profiler.add_time('movement', moved - compacted)
+        profiler.num_steps += 1
+
+    def is_extinct(self):
+        """
+        Determines whether the epidemic is over. With no infected or quarantined Agents, no Agent can be infected or
+        die, so every later step changes nothing but the positions of Agents.
+        :return: True if no Agents are infected or quarantined, False otherwise.
+        """
+        return self.num_infected == 0 and self.num_quarantine == 0
+
+    def run_simulation(self, num_steps, checkpoint_every=None, checkpoint_path=None, track_movement=False):
         """
-        Runs simulation for specified number of time steps, recording a metric count after each step.
+        Runs simulation for specified number of time steps, recording a metric count after each step. If no steps have
+        been run yet, the baseline metrics are recorded first.
+
+        Once the epidemic is extinct (see is_extinct()), including before the first step of a resumed model, the
+        remaining steps are not run: the final metrics are recorded for each of them and current_step is advanced to
+        the end, leaving Agents where they were. The counts are the same as if every step had been run.
 
         :param num_steps: Number of time steps to run the model
-        :return: List of the baseline counts taken at each time step in the model.
+        :param checkpoint_every: If given, a checkpoint is saved to checkpoint_path whenever current_step is a multiple
+        of checkpoint_every.
+        :param checkpoint_path: File to which checkpoints are saved; each checkpoint replaces the previous one.
+        :param track_movement: If True, every step is run even after the epidemic is extinct, so Agents keep moving.
+        :return: Counts of the baseline metrics taken at each time step in the model.
         """
+        if checkpoint_every is not None and checkpoint_path is None:
+            raise ValueError('checkpoint_path is required when checkpoint_every is set')
 
-        self.count_baseline_metrics()
-        self.add_counts()
-        am = AgentMover(self.n)
+        self.counts.reserve(len(self.counts) + num_steps + 1)
+        final_step = self.current_step + num_steps
 
-        # update agents and metrics for each time step
-        for t in range(num_steps):
+        # a model resumed after extinction, such as from a checkpoint, does not run another step
+        steps = self.iter_steps(num_steps)
+        if self.baseline_counted and not track_movement and self.is_extinct():
+            steps = ()
 
-            # update agent properties
-            for agent in self.agents:
+        for snapshot in steps:
+            if self.profiler is None:
+                self.add_counts()
+            else:
+                start = time.perf_counter()
+                self.add_counts()
+                self.profiler.add_time('metrics', time.perf_counter() - start)
 
-                if agent.has_died():
-                    self.remove_agent(agent)
-                else:
-                    adj = self.get_adj_agents(agent)
-                    before = agent.status
-                    agent.update_agent(adj)
-                    after = agent.status
-                    self.update_baseline_metrics(before, after)
+            if checkpoint_every and snapshot.step > 0 and snapshot.step % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint_path)
 
-            # move all agents
-            am.move_all_agents(self.agents)
+            if not track_movement and self.is_extinct():
+                break
+
+        # fast-forward through the steps which would change nothing
+        if self.current_step < final_step:
+            for t in range(final_step - self.current_step):
+                self.add_counts()
+            self.current_step = final_step
 
-            # capture metrics after every time step
-            self.add_counts()
+            if checkpoint_every:
+                self.save_checkpoint(checkpoint_path)
 
         return self.counts
 
+    def save_checkpoint(self, path):
+        """
+        Saves the full state of the model to a binary file, so that a run can be resumed with load_checkpoint() and
+        give exactly the same results as an uninterrupted run. The file holds packed arrays of Agent properties in list
+        order, the metrics, the counts recorded so far, the step counter, the state of every random stream and, in
+        'scheduled' mode, the time step in which each infected Agent dies. The file is written in full before it
+        replaces any existing file at path.
+        :param path: File to write
+        :return: None
+        """
+        agents = self.agents
+        m = len(agents)
+
+        arrays = {
+            'settings': np.array([self.n, self.m, self.current_step, self.num_recovered, self.num_infected,
+                                  self.num_susceptible, self.num_dead, self.num_quarantine], dtype=np.int64),
+            'movement': np.array(self.movement),
+            'progression': np.array(self.progression),
+            'position': np.array([agent.position for agent in agents], dtype=np.int64).reshape(m, 2),
+            'status': np.array([Agent.statuses.index(agent.status) for agent in agents], dtype=np.int8),
+            'mask': np.array([agent.mask for agent in agents], dtype=bool),
+            'distancing': np.array([agent.distancing for agent in agents], dtype=bool),
+            'asymptomatic': np.array([agent.asymptomatic for agent in agents], dtype=bool),
+            'days_infected': np.array([self.get_days_infected(agent) for agent in agents], dtype=np.int16),
+            'counts': self.counts.array,
+        }
+
+        generator_states = {}
+        for name, rng in self.rngs.items():
+            state = rng.get_state()
+            generator_states[name] = state['generator']
+            arrays['pending_' + name] = np.array(state['pending'], dtype=np.float64)
+        arrays['generator_states'] = np.array(json.dumps(generator_states))
+
+        if self.schedule is not None:
+            arrays['death_step'] = np.array([self.schedule.get_death_step(agent) for agent in agents], dtype=np.int64)
+
+        temp_path = str(path) + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load_checkpoint(cls, path):
+        """
+        Creates a model from a file written by save_checkpoint(). Running the loaded model continues the original run
+        exactly where the checkpoint was taken.
+        :param path: File to read
+        :return: ABM
+        """
+        with np.load(path) as data:
+            model = cls.__new__(cls)
+
+            settings = data['settings'].tolist()
+            model.n, model.m, model.current_step = settings[:3]
+            model.num_recovered, model.num_infected, model.num_susceptible, model.num_dead, model.num_quarantine = \
+                settings[3:]
+            model.baseline_counted = model.current_step > 0 or len(data['counts']) > 0
+            model.movement = str(data['movement'])
+            model.progression = str(data['progression']) if 'progression' in data.files else 'sweep'
+            model.profiler = None
+            model.rngs = {name: BlockRNG() for name in stream_names}
+            model.schedule = None
+
+            agents = []
+            for position, status, mask, distancing, asymptomatic, days_infected in zip(
+                    data['position'].tolist(), data['status'].tolist(), data['mask'].tolist(),
+                    data['distancing'].tolist(), data['asymptomatic'].tolist(), data['days_infected'].tolist()):
+                agent = Agent(tuple(position), Agent.statuses[status], mask, distancing, rng=model.rngs['progression'])
+                agent.asymptomatic = asymptomatic
+                agent.days_infected = days_infected
+                agents.append(agent)
+            model.agents = agents  # builds occupancy grid
+
+            model.counts = Counts(len(data['counts']))
+            for row in data['counts']:
+                model.counts.append(row)
+
+            # restore random streams last, as creating infected Agents draws from the progression stream
+            generator_states = json.loads(str(data['generator_states']))
+            for name, rng in model.rngs.items():
+                rng.set_state({'generator': generator_states[name], 'pending': data['pending_' + name].tolist()})
+
+            # deaths already drawn for infected Agents
+            if model.progression == 'scheduled' and 'death_step' in data.files:
+                model.schedule = ProgressionSchedule.from_agents(agents, model.current_step, model.rngs['progression'],
+                                                                 data['death_step'].tolist())
+
+        return model
+
     def run_and_visualize_simulation(self, num_steps):
         """
         Helper function for debugging. Outputs visualization of the simulation.
@@ -197,7 +753,7 @@ class ABM:
 
                 ax.scatter(agent.position[0], agent.position[1], c=c, marker=m)
 
-            am = AgentMover(self.n)
+            am = AgentMover(self.n, self.grid, self.rngs['movement'])
             am.move_all_agents(self.agents)
 
             ax.grid(True)
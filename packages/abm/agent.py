@@ -5,17 +5,44 @@ class Agent:
     """
     Defines an Agent's properties and behaviors when interacting with other Agents.
 
+    Agents declare __slots__ so that each instance stores only its fields, without a per-instance __dict__. Statuses
+    are single letter strings, which Python interns, so every Agent shares the same status objects. For the same
+    reason, every Agent draws its random decisions from the provider shared by the class, rng, rather than keeping one
+    of its own; a model sets rng to its own stream while it updates its Agents.
+
     Fields:
 
+        position:      Location of the Agent in the world, as defined by (x,y).
+
+        status:        The state of the Agent's health.
+
+        mask:          True if agent is wearing a mask.
+
+        distancing:    True if agent is physically distancing.
+
         asymptomatic:  True if agent is asymptomatic when infected.
 
         days_infected: How long agent has been infected, if currently infected.
 
     """
+    __slots__ = ('position', 'status', 'mask', 'distancing', 'asymptomatic', 'days_infected')
+
+    # source of random decisions shared by every Agent, providing random() and randint(a, b); the random module or a
+    # BlockRNG
+    rng = random
+
     statuses = ['R', 'S', 'I', 'Q']  # allowable statuses
-    days_infected = 0
 
-    def __init__(self, position, status, mask, distancing):
+    # chance of infection from one infected adjacent agent, indexed by the number of masked agents in the pair
+    infection_rates = [1 / 4, 1 / 100, 1 / 10000]  # 25%, 1%, 0.01%
+
+    # chance of being asymptomatic when infected
+    asymptomatic_rate = 1 / 5  # 20%
+
+    # chance of dying in each time step while infected or quarantined
+    death_rate = 2 / 1000  # 0.2%
+
+    def __init__(self, position, status, mask, distancing, rng=None):
         """
         Initializes an agent.
         :param position: Location of the Agent in the world, as defined by (x,y).
@@ -26,7 +53,10 @@ class Agent:
             (Q) Quarantined
         :param mask: True if agent is wearing a mask.
         :param distancing: True if agent is physically distancing.
+        :param rng: Optional source of random decisions, such as a BlockRNG, for the draw made when creating an infected
+        Agent. Defaults to the provider shared by every Agent, rng.
         """
+
         # position (x,y)
         self.position = position
 
@@ -38,7 +68,7 @@ class Agent:
 
         # possibly asymptomatic if infected
         if status == 'I':
-            if self.is_asymptomatic():
+            if self.is_asymptomatic(rng):
                 self.asymptomatic = True
             else:
                 self.asymptomatic = False
@@ -47,6 +77,7 @@ class Agent:
 
         self.mask = mask
         self.distancing = distancing
+        self.days_infected = 0
 
     def is_event(self, num_event, num_outcomes):
         """
@@ -56,51 +87,67 @@ class Agent:
         :param num_outcomes: The number of possible outcomes.
         :return: True if event occurs, False otherwise.
         """
-        return random.randint(1, num_outcomes) <= num_event
+        return self.rng.randint(1, num_outcomes) <= num_event
+
+    @staticmethod
+    def infection_probability(num_unmasked, num_one_masked, num_both_masked):
+        """
+        Calculates the probability of infection given the number of infected adjacent agents in each mask pairing.
+        Each infected adjacent agent is an independent chance of infection, so the probability of infection is
+        1 - (1 - p_0)^a * (1 - p_1)^b * (1 - p_2)^c, where p_k is the infection rate when k agents in the pair are
+        masked.
+
+        Works element-wise when given NumPy arrays of counts.
+        :param num_unmasked: Number of infected adjacent agents where neither agent is masked.
+        :param num_one_masked: Number of infected adjacent agents where only one agent is masked.
+        :param num_both_masked: Number of infected adjacent agents where both agents are masked.
+        :return: Probability that the agent is infected.
+        """
+        p_0, p_1, p_2 = Agent.infection_rates
+        return 1 - (1 - p_0) ** num_unmasked * (1 - p_1) ** num_one_masked * (1 - p_2) ** num_both_masked
 
     def is_infected(self, adjacent_agents):
         """
         Calculates whether Agent is infected, given a list of adjacent agents. Infection depends on whether
         an adjacent agent is infected or masked and whether the agent is masked.
 
-        A check is performed separately for each agent adjacent to this agent.
+        Infected adjacent agents are counted by mask pairing, and a single draw is made against the combined
+        probability of infection from all of them (see infection_probability). No draw is made if no adjacent agent
+        is infected.
         :param adjacent_agents:
         :return: True if the agent is now infected, False otherwise.
         """
-        infected = False
+        num_unmasked = 0
+        num_one_masked = 0
+        num_both_masked = 0
 
-        # perform check for all adjacent agents
+        # count infected adjacent agents by mask pairing
         for adjacent in adjacent_agents:
-
-            # chance of infection if an adjacent agent is infected
             if adjacent.status == 'I':
 
-                # infection probability depends on mask status of both
                 if self.mask and adjacent.mask:
-
-                    if self.is_event(1, 10000):  # 0.01% chance
-                        infected = True
-
+                    num_both_masked += 1
                 elif self.mask or adjacent.mask:
-
-                    if self.is_event(1, 100):  # 1% chance
-                        infected = True
-
+                    num_one_masked += 1
                 else:
+                    num_unmasked += 1
 
-                    if self.is_event(1, 4):  # 25% chance
-                        infected = True
+        if num_unmasked + num_one_masked + num_both_masked == 0:
+            return False
 
-        return infected
+        p = self.infection_probability(num_unmasked, num_one_masked, num_both_masked)
+        return self.rng.random() < p
 
-    def is_asymptomatic(self):
+    def is_asymptomatic(self, rng=None):
         """
-        Calculates whether Agent is asymptomatic. Model assumes that Agents have a
-        20% chance of being asymptomatic upon infection.
+        Calculates whether Agent is asymptomatic. Model assumes that Agents have an
+        asymptomatic_rate (20%) chance of being asymptomatic upon infection.
 
+        :param rng: Optional source of random decisions; defaults to the provider shared by every Agent, rng.
         :return: True if agent is asymptomatic, False otherwise.
         """
-        return self.is_event(1, 5)  # 20% chance of being asymptomatic
+        rng = self.rng if rng is None else rng
+        return rng.random() < self.asymptomatic_rate
 
     def will_quarantine(self):
         """
@@ -148,12 +195,13 @@ class Agent:
         :return: None
         """
 
+        status_before = self.status
+
         # update days infected if already infected
-        if self.status == 'I' or self.status == 'Q':
+        if status_before == 'I' or status_before == 'Q':
             self.days_infected += 1  # day passed since infection started
 
         # update status
-        status_before = self.status
         self.update_status(adjacent_agents)
 
         # if now infected, determine if asymptomatic
@@ -176,8 +224,9 @@ class Agent:
 
     def has_died(self):
         """
-        Calculates whether Agent has died. This model assumes Agent has a 0.2% chance of dying during infection.
+        Calculates whether Agent has died. This model assumes Agent has a death_rate (0.2%) chance of dying in each time
+        step of infection. No draw is made if the Agent is not infected, or if death_rate is 0.
         :return: True if agent dies due to infection, False otherwise.
         """
         infected = self.status == 'I' or self.status == 'Q'
-        return infected and self.is_event(2, 1000)  # 0.2% chance
+        return infected and self.death_rate > 0 and self.rng.random() < self.death_rate
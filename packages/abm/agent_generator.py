@@ -1,4 +1,7 @@
 import random
+
+import numpy as np
+
 from packages.abm.agent import Agent
 
 
@@ -18,9 +21,15 @@ class AgentGenerator:
         num_mask: the number of Agents which are masked at the start
 
         num_vaccinated: the number of Agents which are in a recovered state at the start
+
+        rng:            source of random decisions, providing random() and randint(a, b)
+
+        agent_rng:      source of random decisions made when generating Agents, such as whether an infected Agent is
+                        asymptomatic
     """
 
-    def __init__(self, m, num_infected, percent_distancing, percent_mask, percent_vaccinated=0.0):
+    def __init__(self, m, num_infected, percent_distancing, percent_mask, percent_vaccinated=0.0, rng=None,
+                 agent_rng=None):
         """
         Sets the number of distancing, masked, and vaccinated Agents which will be generated by generate_agents().
         :param m: the number of Agents to be generated
@@ -28,11 +37,15 @@ class AgentGenerator:
         :param percent_distancing: the percent of Agents which have distancing=True property at the start
         :param percent_mask: the percent of Agents which are masked at the start
         :param percent_vaccinated: the percent of Agents which are in a recovered state at the start
+        :param rng: source of random decisions, such as a BlockRNG. Defaults to the random module.
+        :param agent_rng: source of random decisions made when generating Agents. Defaults to rng.
         """
 
         # capture parameters
         self.m = m
         self.num_infected = num_infected
+        self.rng = random if rng is None else rng
+        self.agent_rng = self.rng if agent_rng is None else agent_rng
 
         # set discrete numbers for distancing, mask, vaccinated
         self.num_distancing = int(round(percent_distancing * m))
@@ -95,20 +108,21 @@ class AgentGenerator:
 
     def select_indexes(self, p):
         """
-        Selects p random positions between 0 and m-1.
+        Selects p random positions between 0 and m-1, using a partial Fisher-Yates shuffle of the positions. Positions
+        which have been swapped are kept in a dictionary, so exactly p random draws are made and the cost does not
+        depend on m.
         :param p: The number of random positions to select.
         :return: List of integers representing selected positions in the Agents list.
         """
 
         chosen = list()
+        swapped = dict()  # position currently found at each swapped index
         for i in range(p):
 
-            position = random.randint(0, self.m - 1)
-            while position in chosen:
-                # try again
-                position = random.randint(0, self.m - 1)
+            j = self.rng.randint(i, self.m - 1)
+            chosen.append(swapped.get(j, j))
+            swapped[j] = swapped.get(i, i)
 
-            chosen.append(position)
         return chosen
 
     def generate_agents(self):
@@ -130,8 +144,8 @@ class AgentGenerator:
         current_vaccinated = 0
 
         # randomly select indexes for mask and distancing
-        mask_indexes = self.select_indexes(self.num_mask)
-        distancing_indexes = self.select_indexes(self.num_distancing)
+        mask_indexes = set(self.select_indexes(self.num_mask))
+        distancing_indexes = set(self.select_indexes(self.num_distancing))
 
         for i in range(self.m):
 
@@ -153,7 +167,32 @@ class AgentGenerator:
             distancing = i in distancing_indexes
 
             # position will be set later
-            new_agent = Agent((-1, -1), status, mask=mask, distancing=distancing)
+            new_agent = Agent((-1, -1), status, mask=mask, distancing=distancing, rng=self.agent_rng)
             agents.append(new_agent)
 
         return agents
+
+    def generate_arrays(self):
+        """
+        Creates the same properties as generate_agents, but as one array for each property instead of a list of Agents.
+        Infected Agents come first, followed by vaccinated Agents, as in generate_agents.
+
+        :return: Dictionary of arrays of length m: 'status' (index of the status in Agent.statuses), 'mask',
+        'distancing' and 'asymptomatic'.
+        """
+        status = np.full(self.m, Agent.statuses.index('S'), dtype=np.int8)
+        status[:self.num_infected] = Agent.statuses.index('I')
+        status[self.num_infected:self.num_infected + self.num_vaccinated] = Agent.statuses.index('R')
+
+        mask = np.zeros(self.m, dtype=bool)
+        mask[self.select_indexes(self.num_mask)] = True
+
+        distancing = np.zeros(self.m, dtype=bool)
+        distancing[self.select_indexes(self.num_distancing)] = True
+
+        # same chance as Agent.is_asymptomatic
+        asymptomatic = np.zeros(self.m, dtype=bool)
+        asymptomatic[:self.num_infected] = [self.agent_rng.random() < Agent.asymptomatic_rate
+                                            for i in range(self.num_infected)]
+
+        return {'status': status, 'mask': mask, 'distancing': distancing, 'asymptomatic': asymptomatic}
@@ -1,4 +1,7 @@
 import random
+from packages.abm.agent import Agent
+from packages.abm.free_positions import FreePositions
+from packages.abm.occupancy_grid import OccupancyGrid
 
 
 class AgentMover:
@@ -9,9 +12,23 @@ class AgentMover:
 
     Fields:
 
-        n: the dimension of the square torus grid
-           used to define the world in which Agents
-           move
+        n:    the dimension of the square torus grid
+              used to define the world in which Agents
+              move
+
+        grid: optional OccupancyGrid which is kept
+              up to date as Agents are moved; when set,
+              nearby Agents and available positions
+              are read from the grid instead of the
+              list of Agents
+
+        rng:  source of random decisions, providing
+              random() and randint(a, b)
+
+        profiler: optional Profiler which counts
+              placement attempts, placements which
+              fell back to the lattice and Agents with
+              no legal move
     """
 
     # allowable moves
@@ -30,12 +47,22 @@ class AgentMover:
     # all moves which extend 2 positions from current position (0,0)
     directions_dia_2 = [[i, j] for i in range(-2, 3) for j in range(-2, 3) if (i, j) != (0, 0)]
 
-    def __init__(self, n):
+    # minimum distance between Agents which can be moved at the same time: a move can only affect Agents within the
+    # 3 positions searched by find_nearby_agents
+    sweep_separation = 4
+
+    def __init__(self, n, grid=None, rng=None, profiler=None):
         """
         Initializes AgentMover.
         :param n: The dimension of the n x n torus grid world.
+        :param grid: Optional OccupancyGrid to update whenever an Agent is moved.
+        :param rng: Source of random decisions, such as a BlockRNG. Defaults to the random module.
+        :param profiler: Optional Profiler to update with movement and placement counters.
         """
         self.n = n
+        self.grid = grid
+        self.rng = random if rng is None else rng
+        self.profiler = profiler
 
     def get_random_position(self, selected):
         """
@@ -46,13 +73,13 @@ class AgentMover:
         """
 
         # try random position
-        i = random.randint(0, self.n - 1)
-        j = random.randint(0, self.n - 1)
+        i = self.rng.randint(0, self.n - 1)
+        j = self.rng.randint(0, self.n - 1)
 
         while (i, j) in selected:
             # keep trying if position has already been chosen
-            i = random.randint(0, self.n - 1)
-            j = random.randint(0, self.n - 1)
+            i = self.rng.randint(0, self.n - 1)
+            j = self.rng.randint(0, self.n - 1)
 
         return (i, j)
 
@@ -171,7 +198,8 @@ class AgentMover:
     def position_distancing_agents(self, distancing_agents):
         """
         Attempts to find unique positions for given list of distancing agents such that every agent maintains at least
-        one position between itself and every other agent.
+        one position between itself and every other agent. Each agent is given a random position from the pool of
+        free positions, and the positions surrounding it are then removed from the pool.
 
         :param distancing_agents: List of Agents which have distancing requirements.
         :return: (True, unavailable) if such a positioning is found, (False, unavailable) otherwise. unavailable is a
@@ -180,6 +208,7 @@ class AgentMover:
 
         # reset for new attempt
         unavailable = set()
+        free = FreePositions(self.n)
         num_positioned = 0
 
         for agent in distancing_agents:
@@ -188,14 +217,16 @@ class AgentMover:
             if not self.positions_available(unavailable, distancing_agents, num_positioned):
                 return (False, unavailable)
 
-                # choose available position
-            position = self.get_random_position(unavailable)
+            # choose available position
+            position = free.draw(self.rng)
             agent.position = position
 
             # update available positions
             curr_unavailable = self.get_adj_positions(position)  # positions surrounding are not available
+            for each in curr_unavailable:
+                free.discard(each)
             curr_unavailable.add(position)  # position taken is not available
-            unavailable = unavailable.union(curr_unavailable)  # update full list
+            unavailable.update(curr_unavailable)  # update full list
 
             # update counter
             num_positioned += 1
@@ -203,32 +234,75 @@ class AgentMover:
         # all agents were positioned successfully
         return (True, unavailable)
 
+    def get_distancing_capacity(self):
+        """
+        Calculates the number of distancing agents which position_distancing_agents_lattice can position. This is the
+        largest possible number of distancing agents if n is even, and slightly less than the largest possible number
+        if n is odd.
+        :return: Number of positions in the lattice.
+        """
+        return max(1, self.n // 2) ** 2
+
+    def get_distancing_limit(self):
+        """
+        Calculates the largest number of distancing agents which fit on the n x n torus grid, which has
+        n * (n // 2) // 2 positions no two of which are adjacent. This equals get_distancing_capacity() if n is even. If
+        n is odd, random positioning can sometimes place more distancing agents than the lattice, up to this limit.
+        :return: Largest number of distancing agents.
+        """
+        return max(self.get_distancing_capacity(), self.n * (self.n // 2) // 2)
+
+    def position_distancing_agents_lattice(self, distancing_agents):
+        """
+        Positions distancing agents on a lattice of positions 2 apart in each direction, starting from a random offset.
+        No two lattice positions are adjacent, including around the edges of the torus grid, so every agent maintains
+        at least one position between itself and every other agent. Agents fill the lattice in row order, which leaves
+        as many positions as possible available for the remaining agents.
+
+        :param distancing_agents: List of Agents which have distancing requirements.
+        :return: (True, unavailable) if there is room for all agents on the lattice, (False, unavailable) otherwise.
+        unavailable is a set containing all positions which cannot be selected for agents.
+        """
+        unavailable = set()
+        if len(distancing_agents) > self.get_distancing_capacity():
+            return (False, unavailable)
+
+        size = max(1, self.n // 2)
+        x_offset = self.rng.randint(0, self.n - 1)
+        y_offset = self.rng.randint(0, self.n - 1)
+
+        rows = [(x_offset + 2 * a) % self.n for a in range(size)]
+        columns = [(y_offset + 2 * b) % self.n for b in range(size)]
+        lattice = [(i, j) for i in rows for j in columns]
+
+        for agent, position in zip(distancing_agents, lattice):
+            agent.position = position
+
+            unavailable.update(self.get_adj_positions(position))
+            unavailable.add(position)
+
+        return (True, unavailable)
+
     def position_remaining_agents(self, agents, unavailable):
         """
-        Positions all agents without distancing requirements.
+        Positions all agents without distancing requirements, drawing positions from the pool of free positions so
+        that no draw is ever rejected.
 
         :param agents: List of Agents to be positioned
         :param unavailable: List of unavailable positions
         :return:  True if agents were positioned successfully, False otherwise.
         """
 
-        num_positioned = 0
-        for agent in agents:
+        # only continue if there are enough positions left
+        if not self.positions_available(unavailable, agents, 0):
+            return False
 
-            # only continue if there are enough positions left
-            if not self.positions_available(unavailable, agents, num_positioned):
-                return False
+        free = FreePositions(self.n, unavailable)
+        positions = free.draw_positions(len(agents), self.rng)
 
-            # choose available position
-            position = self.get_random_position(unavailable)
+        for agent, position in zip(agents, positions):
             agent.position = position
 
-            # update available positions
-            unavailable.add(position)
-
-            # update counter
-            num_positioned += 1
-
         # all agents were positioned successfully
         return True
 
@@ -239,6 +313,8 @@ class AgentMover:
         those agents which may be affected by this agent after a move.
 
         See diagram "02718-HW4-Moves.png" which illustrates why a diameter of 3 is used.
+
+        If an occupancy grid is set, only the 48 positions in the search space are read and agents is not used.
         :param agents: List of Agents
         :param position: Current (i,j) position
         :return: List of available positions
@@ -246,6 +322,9 @@ class AgentMover:
         # determine positions within 3 spaces of this agent
         search_space = self.get_search_space(position, self.directions_dia_3)
 
+        if self.grid is not None:
+            return self.grid.get_agents(search_space)
+
         # find all agents within that search space
         nearby = list()
         for agent in agents:
@@ -315,10 +394,15 @@ class AgentMover:
          2 - allow this agent to maintain its own distancing boundaries if necessary;
          3 - outside distancing boundaries of another agent;
 
+        If an occupancy grid is set, availability is read from the grid and agents is not used.
+
         :param agent: Agent being considered
         :param agents: List of all Agents
         :return: List of available positions
         """
+        if self.grid is not None:
+            return self.get_grid_available_positions(agent)
+
         # if no nearby agents, all positions available
         avail = self.get_adj_positions(agent.position)
 
@@ -341,28 +425,144 @@ class AgentMover:
 
         return avail
 
+    def get_grid_available_positions(self, agent):
+        """
+        Calculates the same available positions as get_available_positions, using the counts kept by the occupancy
+        grid so that only the 8 positions surrounding the agent are read. A surrounding position is available if:
+         1 - it is not occupied;
+         2 - no distancing agent other than this agent is adjacent to it;
+         3 - if this agent is distancing, no agent other than this agent is adjacent to it.
+
+        :param agent: Agent being considered
+        :return: Set of available positions
+        """
+        grid = self.grid
+
+        # discount this agent's own contribution to the adjacent counts
+        in_grid = grid.get_agent(agent.position) is agent
+        own = 1 if in_grid else 0
+        own_distancing = 1 if in_grid and agent.distancing else 0
+
+        avail = set()
+        for pos in grid.get_adj_positions(agent.position):
+            i, j = pos
+
+            if grid.cells[i][j] is not None:
+                continue  # occupied
+
+            if grid.adjacent_distancing[i][j] > own_distancing:
+                continue  # breaches distancing of another agent
+
+            if agent.distancing and grid.adjacent_agents[i][j] > own:
+                continue  # breaches distancing of this agent
+
+            avail.add(pos)
+
+        return avail
+
     def move_agent(self, agent, positions):
         """
-        Selects a random position from positions and updates the agent to be at that location.
-        If positions list is empty, does not move the agent.
+        Selects a random position from positions and updates the agent to be at that location, updating the occupancy
+        grid as well if one is set. If positions list is empty, does not move the agent.
         :param agent: Agent under consideration
         :param positions: List of available positions
         :return: None
         """
         if positions:
-            i = random.randint(0, len(positions) - 1)  # random index
-            agent.position = list(positions)[i]
+            i = self.rng.randint(0, len(positions) - 1)  # random index
+            position = list(positions)[i]
+
+            if self.grid is not None:
+                self.grid.move_agent(agent, position)
+            else:
+                agent.position = position
+
+        elif self.profiler is not None:
+            self.profiler.count('no_legal_move')
 
     def move_all_agents(self, agents):
         """
         Selects and moves each agent in agents.
+
+        If no occupancy grid is set, a temporary grid is built from agents for the duration of the call so that each
+        move only reads the positions surrounding the agent.
         :param agents: List of all Agents
         :return: None
         """
+        if self.grid is None:
+            AgentMover(self.n, OccupancyGrid(self.n, agents), self.rng, self.profiler).move_all_agents(agents)
+            return
+
         for agent in agents:
             moves = self.get_available_positions(agent, agents)
             self.move_agent(agent, moves)
 
+    def get_axis_colors(self):
+        """
+        Assigns a color to each coordinate along one axis of the torus grid, such that any two different coordinates
+        with the same color are at least sweep_separation positions apart, wrapping around the torus when necessary.
+
+        Coordinates are colored 0, 1, 2, 3, 0, 1, ... in turn. If n is not a multiple of 4, the last 4 + (n mod 4)
+        coordinates are given colors 0 to 3 + (n mod 4) so that the pattern still wraps around correctly. If n is less
+        than 8, every coordinate is given its own color.
+        :return: List of n colors, one for each coordinate.
+        """
+        n = self.n
+        period = self.sweep_separation
+
+        if n < 2 * period:
+            return list(range(n))
+
+        extra = n % period
+        colors = [i % period for i in range(n - period - extra)]
+        colors += list(range(period + extra))
+
+        return colors
+
+    def get_color_classes(self, agents):
+        """
+        Splits agents into color classes by the colors of the coordinates of their positions. Any two Agents in the same
+        class are at least sweep_separation positions apart, so moving one cannot change the positions available to
+        another.
+        :param agents: List of all Agents
+        :return: List of lists of Agents, one for each nonempty color class, in color order.
+        """
+        colors = self.get_axis_colors()
+        classes = dict()
+
+        for agent in agents:
+            i, j = agent.position
+            color = (colors[i], colors[j])
+
+            if color in classes:
+                classes[color].append(agent)
+            else:
+                classes[color] = [agent]
+
+        return [classes[color] for color in sorted(classes)]
+
+    def move_all_agents_checkerboard(self, agents):
+        """
+        Moves each agent in agents, one color class at a time. The available positions of every Agent in a class are
+        calculated before any Agent in the class is moved, so each class can be treated as a single batch of
+        independent moves. Every Agent is still moved at most once and the same positioning and distancing rules as
+        move_all_agents are followed.
+
+        If no occupancy grid is set, a temporary grid is built from agents for the duration of the call.
+        :param agents: List of all Agents
+        :return: None
+        """
+        if self.grid is None:
+            AgentMover(self.n, OccupancyGrid(self.n, agents), self.rng,
+                       self.profiler).move_all_agents_checkerboard(agents)
+            return
+
+        for color_class in self.get_color_classes(agents):
+            moves = [self.get_grid_available_positions(agent) for agent in color_class]
+
+            for agent, positions in zip(color_class, moves):
+                self.move_agent(agent, positions)
+
     def check_position_conflicts(self, agents):
         """
         Returns a set of positions which contain more than one agent. Used for testing purposes.
@@ -419,7 +619,13 @@ class AgentMover:
         Positions given agents on n x n grid, following distancing constraints for distancing agents. Performs multiple
         positioning attempts until either a solution is found or the number of allowed attempts is exhausted.
 
-        Raises ValueError if no viable positioning is found after all attempts.
+        Distancing agents are first positioned at random. If that fails 10 times in a row, or leaves too little room for
+        the other agents 10 times, they are positioned on a lattice instead (see position_distancing_agents_lattice),
+        which always succeeds if there is room for them and leaves the most room for the other agents.
+
+        Raises ValueError if there is no room for the distancing agents (see get_distancing_limit), or if no viable
+        positioning is found after all attempts. If n is odd, there may be room for more distancing agents than the
+        lattice holds; positioning these relies on random positioning, and fails if the lattice is needed.
 
         :param agents: List of all Agents
         :return: True if positioning is found.
@@ -430,6 +636,12 @@ class AgentMover:
         attempt_counter_outer = 0
         all_success = False
 
+        limit = self.get_distancing_limit()
+        if len(distancing_agents) > limit:
+            raise ValueError('Unable to find positions for ' + str(len(distancing_agents)) + ' distancing agents: at '
+                             + 'most ' + str(limit) + ' fit on a ' + str(self.n) + ' x ' + str(self.n) + ' grid')
+        capacity = self.get_distancing_capacity()
+
         # both distancing and other agents must be positioned
         while all_success is False:
 
@@ -437,23 +649,52 @@ class AgentMover:
             unavailable = set()
             d_success = False
             attempt_counter_inner = 0
+            use_lattice = attempt_counter_outer >= 10
 
             # attempt to position distancing agents first
             while d_success is False:
 
-                d_success, unavailable = self.position_distancing_agents(distancing_agents)
+                if use_lattice and len(distancing_agents) > capacity:
+                    raise ValueError('Unable to find positions for ' + str(len(distancing_agents))
+                                     + ' distancing agents: random positioning failed, and the lattice holds at most '
+                                     + str(capacity) + ' on a ' + str(self.n) + ' x ' + str(self.n) + ' grid')
+
+                if use_lattice:
+                    d_success, unavailable = self.position_distancing_agents_lattice(distancing_agents)
+                else:
+                    d_success, unavailable = self.position_distancing_agents(distancing_agents)
 
                 attempt_counter_inner += 1
-                if attempt_counter_inner >= 10:
-                    raise ValueError('Unable to find positions for all distancing agents')
+                if not d_success and attempt_counter_inner >= 10:
+                    use_lattice = True
 
             # position remaining agents after successful positioning of distancing agents
             all_success = self.position_remaining_agents(other_agents, unavailable)
 
+            if self.profiler is not None:
+                self.profiler.count('distancing_placement_attempts', attempt_counter_inner)
+                self.profiler.count('placement_attempts')
+                if use_lattice:
+                    self.profiler.count('lattice_placements')
+
+            # the lattice leaves the most room for other agents, so further attempts would not help
             attempt_counter_outer += 1
-            if attempt_counter_outer >= 100:
+            if not all_success and use_lattice:
                 remaining = self.n * self.n - len(unavailable)
                 raise ValueError('Unable to find positions for other agents:', remaining)
 
         # all agents positioned
         return True
+
+    def get_positions(self, distancing):
+        """
+        Positions Agents given only whether each is distancing, for models which store Agent properties as arrays.
+
+        Raises ValueError if no viable positioning is found.
+        :param distancing: List of booleans, True if the Agent is distancing
+        :return: List of (i,j) positions, one for each Agent.
+        """
+        agents = [Agent((-1, -1), 'S', mask=False, distancing=each) for each in distancing]
+        self.position_agents(agents)
+
+        return [agent.position for agent in agents]
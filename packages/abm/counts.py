@@ -0,0 +1,146 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class CountsRow(Mapping):
+    """
+    Read-only, dictionary-compatible view of the metrics gathered for a single time step. Supports the same lookups as
+    the dictionaries previously stored in ABM.counts (i.e. row['R']) without copying the underlying array.
+
+    Fields:
+
+        row: 1D array of the metrics for the time step, with columns in the order of Counts.statuses
+    """
+
+    def __init__(self, row):
+        """
+        Initializes CountsRow.
+        :param row: 1D array of the metrics for a single time step
+        """
+        self.row = row
+
+    def __getitem__(self, status):
+        """
+        :param status: Single letter string for the status
+        :return: The count for the given status.
+        """
+        return int(self.row[Counts.columns[status]])
+
+    def __iter__(self):
+        """
+        :return: Iterator over the statuses, in column order.
+        """
+        return iter(Counts.statuses)
+
+    def __len__(self):
+        """
+        :return: The number of statuses.
+        """
+        return len(Counts.statuses)
+
+    def __repr__(self):
+        """
+        :return: String representation of the row, formatted as a dictionary.
+        """
+        return repr(dict(self))
+
+
+class Counts:
+    """
+    Defines a preallocated integer buffer which holds the metrics gathered for each time step of a simulation, one row
+    per time step and one column per status. Rows can be read as dictionaries for backward compatibility, or the filled
+    part of the buffer can be used directly as an array.
+
+    Fields:
+
+        statuses: the order of the status columns
+
+        columns:  maps each status to its column index
+
+        buffer:   2D integer array of shape (capacity, 5); only the first len(self) rows are filled
+
+        size:     the number of rows filled so far
+    """
+
+    statuses = ['R', 'D', 'I', 'S', 'Q']
+    columns = {status: i for i, status in enumerate(statuses)}
+    dtype = np.int32
+
+    def __init__(self, capacity=0, buffer=None):
+        """
+        Initializes Counts.
+        :param capacity: Number of rows to preallocate.
+        :param buffer: Optional existing 2D array of shape (capacity, 5) to fill instead of allocating a new one, for
+        example one replicate's slice of a larger results array.
+        """
+        if buffer is None:
+            buffer = np.zeros((capacity, len(self.statuses)), dtype=self.dtype)
+        elif buffer.ndim != 2 or buffer.shape[1] != len(self.statuses):
+            raise ValueError('buffer must have shape (capacity, ' + str(len(self.statuses)) + ')')
+
+        self.buffer = buffer
+        self.size = 0
+
+    def reserve(self, capacity):
+        """
+        Ensures the buffer can hold at least capacity rows without reallocating.
+        :param capacity: Number of rows required
+        :return: None
+        """
+        if capacity > len(self.buffer):
+            buffer = np.zeros((capacity, len(self.statuses)), dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = buffer
+
+    def append(self, values):
+        """
+        Adds a row of metrics, growing the buffer if it is full.
+        :param values: Sequence of counts in the order of statuses
+        :return: None
+        """
+        if self.size == len(self.buffer):
+            self.reserve(max(1, 2 * self.size))
+
+        self.buffer[self.size] = values
+        self.size += 1
+
+    @property
+    def array(self):
+        """
+        :return: Read-only view of the filled rows, with shape (len(self), 5).
+        """
+        view = self.buffer[:self.size]
+        view.flags.writeable = False
+        return view
+
+    def to_dicts(self):
+        """
+        :return: List of dictionaries of the metrics, one for each time step.
+        """
+        return [dict(row) for row in self]
+
+    def __len__(self):
+        """
+        :return: The number of time steps recorded.
+        """
+        return self.size
+
+    def __getitem__(self, index):
+        """
+        :param index: Time step index; negative indexes count from the last recorded time step.
+        :return: CountsRow for the time step.
+        """
+        if index < 0:
+            index += self.size
+        if index < 0 or index >= self.size:
+            raise IndexError('counts index out of range')
+
+        return CountsRow(self.array[index])
+
+    def __iter__(self):
+        """
+        :return: Iterator over a CountsRow for each recorded time step.
+        """
+        for row in self.array:
+            yield CountsRow(row)
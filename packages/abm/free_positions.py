@@ -0,0 +1,144 @@
+import numpy as np
+
+from packages.abm.rng import BlockRNG
+
+
+class FreePositions:
+    """
+    Defines a pool of the positions in the n x n torus grid world which are not yet taken, so that a random free
+    position can be drawn, and any position removed, in constant time. Unlike drawing random positions until one is not
+    taken, every draw succeeds the first time no matter how full the grid is.
+
+    Positions are stored as flat indexes i * n + j in a list, in no particular order. A position is removed by moving
+    the last position in the list into its place and shortening the list by one.
+
+    Fields:
+
+        n:      the dimension of the square torus grid used to define the world in which Agents move
+
+        cells:  list of the flat indexes of the free positions
+
+        index:  list where index[k] is the location of flat index k in cells, or -1 if position k is not free
+    """
+
+    def __init__(self, n, unavailable=()):
+        """
+        Initializes FreePositions.
+        :param n: The dimension of the n x n torus grid world.
+        :param unavailable: Optional collection of (i,j) positions which are not free.
+        """
+        self.n = n
+        self.cells = list(range(n * n))
+        self.index = list(range(n * n))
+
+        for position in unavailable:
+            self.discard(position)
+
+    def __len__(self):
+        """
+        :return: The number of free positions.
+        """
+        return len(self.cells)
+
+    def __contains__(self, position):
+        """
+        :param position: (i,j) position
+        :return: True if the position is free, False otherwise.
+        """
+        return self.index[position[0] * self.n + position[1]] >= 0
+
+    def discard(self, position):
+        """
+        Removes position from the pool. Does nothing if the position is not free.
+        :param position: (i,j) position
+        :return: None
+        """
+        cell = position[0] * self.n + position[1]
+        location = self.index[cell]
+
+        if location < 0:
+            return  # already taken
+
+        # move last free position into the gap
+        last = self.cells.pop()
+        if last != cell:
+            self.cells[location] = last
+            self.index[last] = location
+
+        self.index[cell] = -1
+
+    def draw(self, rng):
+        """
+        Selects a random free position and removes it from the pool.
+
+        Raises ValueError if no positions are free.
+        :param rng: Source of random decisions, providing random()
+        :return: (int, int) Tuple representing (i,j) position in an n x n grid
+        """
+        if not self.cells:
+            raise ValueError('no free positions remain')
+
+        position = divmod(self.cells[int(rng.random() * len(self.cells))], self.n)
+        self.discard(position)
+
+        return position
+
+    def draw_positions(self, k, rng):
+        """
+        Selects k different random free positions and removes them from the pool, using a partial Fisher-Yates
+        shuffle of the end of the list of free positions. If rng is a BlockRNG, the free positions are instead shuffled
+        all at once by its numpy.random.Generator.
+
+        Raises ValueError if fewer than k positions are free.
+        :param k: Number of positions to select
+        :param rng: Source of random decisions, providing random()
+        :return: List of k (i,j) positions.
+        """
+        cells = self.cells
+        index = self.index
+        random = rng.random
+        size = len(cells)
+
+        if k > size:
+            raise ValueError('only ' + str(size) + ' free positions remain')
+
+        if isinstance(rng, BlockRNG):
+            return self.shuffle_positions(k, rng.generator)
+
+        for last in range(size - 1, size - 1 - k, -1):
+            j = int(random() * (last + 1))
+            cell = cells[j]
+            cells[j] = cells[last]
+            cells[last] = cell
+            index[cells[j]] = j
+
+        selected = cells[size - k:]
+        del cells[size - k:]
+
+        n = self.n
+        positions = []
+        for cell in selected:
+            index[cell] = -1
+            positions.append(divmod(cell, n))
+
+        return positions
+
+    def shuffle_positions(self, k, generator):
+        """
+        Selects k different random free positions and removes them from the pool, using a random permutation of all
+        free positions drawn as an array.
+        :param k: Number of positions to select
+        :param generator: numpy.random.Generator
+        :return: List of k (i,j) positions.
+        """
+        cells = np.array(self.cells, dtype=np.int64)[generator.permutation(len(self.cells))]
+        selected = cells[:k]
+        remaining = cells[k:]
+
+        index = np.full(self.n * self.n, -1, dtype=np.int64)
+        index[remaining] = np.arange(len(remaining))
+
+        self.cells = remaining.tolist()
+        self.index = index.tolist()
+
+        return list(zip((selected // self.n).tolist(), (selected % self.n).tolist()))
@@ -0,0 +1,142 @@
+class OccupancyGrid:
+    """
+    Defines an index of which Agent occupies each position in the n x n torus grid world, so that the Agents at a
+    given set of positions can be found without scanning the full list of Agents.
+
+    Alongside occupancy, the grid keeps two count layers which let movement rules be checked one position at a time:
+    the number of Agents adjacent to each position, and the number of distancing Agents adjacent to each position.
+    An Agent's distancing property is read when the Agent is added to the grid.
+
+    Fields:
+
+        n:                    the dimension of the square torus grid used to define the world in which Agents move
+
+        cells:                2D list where cells[i][j] is the Agent positioned at (i,j), or None if the position is
+                              empty
+
+        adjacent_agents:      2D list where adjacent_agents[i][j] is the number of Agents within 1 position of (i,j)
+
+        adjacent_distancing:  2D list where adjacent_distancing[i][j] is the number of distancing Agents within 1
+                              position of (i,j)
+    """
+
+    def __init__(self, n, agents=None):
+        """
+        Initializes OccupancyGrid.
+        :param n: The dimension of the n x n torus grid world.
+        :param agents: Optional list of positioned Agents to add to the grid.
+        """
+        self.n = n
+        self.cells = [[None] * n for i in range(n)]
+        self.adjacent_agents = [[0] * n for i in range(n)]
+        self.adjacent_distancing = [[0] * n for i in range(n)]
+
+        if agents:
+            self.add_agents(agents)
+
+    def add_agent(self, agent):
+        """
+        Adds agent to the grid at its current position. Does nothing if agent is already in the grid at that position.
+
+        Raises ValueError if another Agent already occupies that position.
+        :param agent: Agent to be added
+        :return: None
+        """
+        i, j = agent.position
+        occupant = self.cells[i][j]
+
+        if occupant is agent:
+            return
+        if occupant is not None:
+            raise ValueError('position ' + str(agent.position) + ' is already occupied')
+
+        self.cells[i][j] = agent
+        self.update_adjacent_counts(agent, 1)
+
+    def add_agents(self, agents):
+        """
+        Adds each agent in agents to the grid at its current position.
+        :param agents: List of Agents to be added
+        :return: None
+        """
+        for agent in agents:
+            self.add_agent(agent)
+
+    def remove_agent(self, agent):
+        """
+        Removes agent from the grid. Does nothing if agent is not in the grid at its current position.
+        :param agent: Agent to be removed
+        :return: None
+        """
+        i, j = agent.position
+
+        if self.cells[i][j] is agent:
+            self.cells[i][j] = None
+            self.update_adjacent_counts(agent, -1)
+
+    def update_adjacent_counts(self, agent, change):
+        """
+        Adds change to the adjacent Agent counts (and adjacent distancing counts, if agent is distancing) of every
+        position surrounding the agent.
+        :param agent: Agent being added or removed
+        :param change: 1 if agent is being added, -1 if agent is being removed
+        :return: None
+        """
+        for a, b in self.get_adj_positions(agent.position):
+            self.adjacent_agents[a][b] += change
+
+            if agent.distancing:
+                self.adjacent_distancing[a][b] += change
+
+    def move_agent(self, agent, position):
+        """
+        Moves agent to the given position, updating both the grid and the position of the agent.
+        :param agent: Agent to be moved
+        :param position: (i,j) position to which the Agent is moved
+        :return: None
+        """
+        self.remove_agent(agent)
+        agent.position = position
+        self.add_agent(agent)
+
+    def get_adj_positions(self, position):
+        """
+        Calculates the 8 grid positions adjacent to the given position, wrapping around the torus grid when necessary.
+        Matches AgentMover.get_adj_positions.
+        :param position: Current (i,j) position
+        :return: Set of all 8 (i,j) positions which surround the given position.
+        """
+        n = self.n
+        i, j = position
+
+        up = (i - 1) % n
+        down = (i + 1) % n
+        left = (j - 1) % n
+        right = (j + 1) % n
+
+        return {(up, left), (up, j), (up, right),
+                (i, left), (i, right),
+                (down, left), (down, j), (down, right)}
+
+    def get_agent(self, position):
+        """
+        Returns the Agent at the given position.
+        :param position: (i,j) position
+        :return: Agent at position, or None if the position is empty
+        """
+        return self.cells[position[0]][position[1]]
+
+    def get_agents(self, positions):
+        """
+        Returns all Agents which occupy any of the given positions.
+        :param positions: Collection of (i,j) positions
+        :return: List of Agents found at those positions
+        """
+        found = []
+
+        for i, j in positions:
+            occupant = self.cells[i][j]
+            if occupant is not None:
+                found.append(occupant)  # found one
+
+        return found
@@ -0,0 +1,56 @@
+class Profiler:
+    """
+    Collects the wall time spent in each phase of a simulation, along with counters of events of interest, and reports
+    them once the run is finished. A Profiler is only consulted by ABM, VectorizedABM and AgentMover when one is given
+    to them, so runs without a Profiler are not slowed down.
+
+    Fields:
+
+        times:      dictionary mapping each phase to the total seconds spent in it, in the order phases were first seen
+
+        counters:   dictionary mapping each counter to its total
+
+        num_steps:  the number of time steps profiled
+    """
+
+    def __init__(self):
+        """
+        Initializes Profiler.
+        """
+        self.times = dict()
+        self.counters = dict()
+        self.num_steps = 0
+
+    def add_time(self, phase, seconds):
+        """
+        Adds seconds to the total time of phase.
+        :param phase: Name of the phase
+        :param seconds: Time spent in the phase
+        :return: None
+        """
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+
+    def count(self, counter, amount=1):
+        """
+        Adds amount to counter.
+        :param counter: Name of the counter
+        :param amount: Number of events
+        :return: None
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def report(self):
+        """
+        Summarizes the collected times and counters.
+        :return: Dictionary containing 'steps', the number of time steps profiled; 'phases', mapping each phase to its
+        total 'seconds', its 'per_step' average and its 'fraction' of the total time; and 'counters'.
+        """
+        total = sum(self.times.values())
+
+        phases = dict()
+        for phase, seconds in self.times.items():
+            phases[phase] = {'seconds': seconds,
+                             'per_step': seconds / self.num_steps if self.num_steps else 0.0,
+                             'fraction': seconds / total if total else 0.0}
+
+        return {'steps': self.num_steps, 'phases': phases, 'counters': dict(self.counters)}
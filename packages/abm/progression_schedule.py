@@ -0,0 +1,169 @@
+import math
+
+from packages.abm.agent import Agent
+
+
+class ProgressionSchedule:
+    """
+    Defines a calendar queue of the disease progression events of infected Agents, so that an infected Agent is only
+    touched in the time steps in which its status changes. Quarantine and recovery happen a fixed number of days after
+    infection (see Agent.will_quarantine and Agent.infection_over), so both events are scheduled when the Agent is
+    infected. Events are kept in buckets keyed by time step, and every bucket is removed once its step has run.
+
+    Death is scheduled in the same way. Rather than a draw against Agent.death_rate in each of the time steps an Agent
+    is infected or quarantined, the step of the first success is drawn once at infection from the matching geometric
+    distribution; the Agent dies in that step if it comes before recovery, and otherwise survives. This gives the same
+    distribution of deaths with a single draw per infection.
+
+    Events of Agents which die or recover are not removed from their buckets; instead, only Agents still tracked in
+    infection_steps are returned when a bucket is emptied.
+
+    Fields:
+
+        rng:                source of random decisions for death, providing random(); the progression stream
+
+        buckets:            dictionary mapping each time step to a list of (Agent, status) events due in that step, with
+                            status 'D' for death
+
+        infection_steps:    dictionary mapping each infected or quarantined Agent to the time step of its infection
+
+        death_steps:        dictionary mapping each infected or quarantined Agent which will die to the time step of its
+                            death
+
+        quarantine_delay:   the number of time steps from infection until a symptomatic Agent is quarantined
+
+        recovery_delay:     the number of time steps from infection until an Agent recovers
+    """
+
+    quarantine_delay = 3  # quarantined once infected for more than 2 days
+    recovery_delay = 15  # recovered once infected for more than 14 days
+
+    def __init__(self, rng):
+        """
+        Initializes an empty ProgressionSchedule.
+        :param rng: Source of random decisions, providing random()
+        """
+        self.rng = rng
+        self.buckets = dict()
+        self.infection_steps = dict()
+        self.death_steps = dict()
+
+    @classmethod
+    def from_agents(cls, agents, current_step, rng, death_steps=None):
+        """
+        Builds the schedule for Agents which are already infected or quarantined, using how long each has been
+        infected. Used when a model starts, or resumes from a checkpoint.
+        :param agents: List of Agents
+        :param current_step: The number of time steps run so far
+        :param rng: Source of random decisions, providing random()
+        :param death_steps: Optional list of the time step in which each Agent dies, or -1 if it does not, as from
+        get_death_step(). The death of an infected Agent is drawn if the list, or its entry, is None.
+        :return: ProgressionSchedule
+        """
+        schedule = cls(rng)
+        for i, agent in enumerate(agents):
+            if agent.status == 'I' or agent.status == 'Q':
+                death_step = None if death_steps is None else death_steps[i]
+                schedule.add_infection(agent, current_step - agent.days_infected, current_step, death_step)
+
+        return schedule
+
+    def sample_death_delay(self):
+        """
+        Draws the number of time steps until death from the geometric distribution with success probability
+        Agent.death_rate, by inverse transform sampling.
+        :return: Number of time steps, 1 or more, or None if the Agent dies after it would recover.
+        """
+        if Agent.death_rate <= 0:
+            return None
+
+        delay = int(math.log(1.0 - self.rng.random()) / math.log(1.0 - Agent.death_rate)) + 1
+        return delay if delay <= self.recovery_delay else None
+
+    def add_event(self, step, agent, status):
+        """
+        Schedules a change of status.
+        :param step: Time step in which the status changes
+        :param agent: Agent whose status changes
+        :param status: Status after the change
+        :return: None
+        """
+        bucket = self.buckets.get(step)
+        if bucket is None:
+            self.buckets[step] = [(agent, status)]
+        else:
+            bucket.append((agent, status))
+
+    def add_infection(self, agent, step, current_step=None, death_step=None):
+        """
+        Schedules the progression of an Agent infected in step: death, if it is drawn to die before recovery;
+        quarantine, unless the Agent is asymptomatic; and recovery. Death is only possible after current_step, which
+        gives the right distribution for an Agent which has already survived since its infection, as the geometric
+        distribution is memoryless.
+        :param agent: Infected Agent
+        :param step: Time step in which the Agent was infected
+        :param current_step: Optional time step which has already run; events due by then are not scheduled
+        :param death_step: Optional time step in which the Agent dies, or -1 if it does not; drawn if not given
+        :return: None
+        """
+        if current_step is None:
+            current_step = step
+
+        self.infection_steps[agent] = step
+
+        if death_step is None:
+            delay = self.sample_death_delay()
+            if delay is not None and current_step + delay <= step + self.recovery_delay:
+                death_step = current_step + delay
+
+        # death is added first, so it takes precedence over other events in the same step
+        if death_step is not None and death_step > current_step:
+            self.death_steps[agent] = death_step
+            self.add_event(death_step, agent, 'D')
+
+        if not agent.asymptomatic and step + self.quarantine_delay > current_step:
+            self.add_event(step + self.quarantine_delay, agent, 'Q')
+        self.add_event(step + self.recovery_delay, agent, 'R')
+
+    def remove_agent(self, agent):
+        """
+        Stops tracking an Agent. Its scheduled events are ignored.
+        :param agent: Agent
+        :return: None
+        """
+        self.infection_steps.pop(agent, None)
+        self.death_steps.pop(agent, None)
+
+    def pop_events(self, step):
+        """
+        Removes the events due in a time step. Agents which die or recover are no longer tracked. If an Agent has more
+        than one event in the step, only its first event, death, is returned.
+        :param step: Time step
+        :return: Dictionary mapping each Agent with an event due in step to its new status, 'D' for death.
+        """
+        events = dict()
+        infection_steps = self.infection_steps
+
+        for agent, status in self.buckets.pop(step, ()):
+            if agent in infection_steps and agent not in events:
+                events[agent] = status
+                if status != 'Q':
+                    self.remove_agent(agent)
+
+        return events
+
+    def get_days_infected(self, agent, current_step):
+        """
+        :param agent: Agent
+        :param current_step: The number of time steps run so far
+        :return: How long agent has been infected, or 0 if it is not infected or quarantined.
+        """
+        step = self.infection_steps.get(agent)
+        return 0 if step is None else current_step - step
+
+    def get_death_step(self, agent):
+        """
+        :param agent: Agent
+        :return: The time step in which agent dies, or -1 if it is not scheduled to die.
+        """
+        return self.death_steps.get(agent, -1)
@@ -0,0 +1,280 @@
+import numpy as np
+
+from packages.abm.counts import Counts
+
+
+class RunningStatistics:
+    """
+    Defines an aggregator which keeps the mean and variance of every (time step, status) count across replicates,
+    updated with Welford's algorithm as each replicate finishes. Memory use depends only on the number of time steps,
+    not on the number of replicates, and the statistics are available as soon as the last replicate is added.
+
+    Batches of replicates are combined with the parallel form of the algorithm (Chan et al.), which gives the same
+    result as adding the replicates one at a time.
+
+    Fields:
+
+        count:  the number of replicates added
+
+        mean:   float array of shape (num_steps + 1, 5) holding the mean count for each time step and status, with
+                columns in the order of Counts.statuses; None until the first replicate is added
+
+        m2:     float array of the same shape holding the sum of squared differences from the mean
+    """
+
+    def __init__(self):
+        """
+        Initializes RunningStatistics with no replicates.
+        """
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+
+    def update(self, counts):
+        """
+        Adds one replicate.
+        :param counts: Array of shape (num_steps + 1, 5), or Counts, holding the counts of one replicate
+        :return: None
+        """
+        if isinstance(counts, Counts):
+            counts = counts.array
+
+        counts = np.asarray(counts, dtype=np.float64)
+
+        if self.mean is None:
+            self.mean = np.zeros(counts.shape)
+            self.m2 = np.zeros(counts.shape)
+        elif counts.shape != self.mean.shape:
+            raise ValueError('counts must have shape ' + str(self.mean.shape))
+
+        self.count += 1
+        delta = counts - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (counts - self.mean)
+
+    def update_batch(self, batch):
+        """
+        Adds several replicates at once, such as a chunk yielded by iter_replicates().
+        :param batch: Array of shape (num_replicates, num_steps + 1, 5)
+        :return: None
+        """
+        batch = np.asarray(batch, dtype=np.float64)
+        if len(batch) == 0:
+            return
+
+        other = RunningStatistics()
+        other.count = len(batch)
+        other.mean = batch.mean(axis=0)
+        other.m2 = ((batch - other.mean) ** 2).sum(axis=0)
+
+        self.merge(other)
+
+    def merge(self, other):
+        """
+        Combines the replicates added to other into this aggregator.
+        :param other: RunningStatistics
+        :return: None
+        """
+        if other.count == 0:
+            return
+
+        if self.count == 0:
+            self.count = other.count
+            self.mean = other.mean.copy()
+            self.m2 = other.m2.copy()
+            return
+
+        if other.mean.shape != self.mean.shape:
+            raise ValueError('counts must have shape ' + str(self.mean.shape))
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+
+        self.mean = self.mean + delta * (other.count / count)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / count)
+        self.count = count
+
+    def get_variance(self, ddof=0):
+        """
+        :param ddof: Delta degrees of freedom; 0 gives the population variance (as numpy.var), 1 the sample variance
+        :return: Array of the variance of each (time step, status) count.
+        """
+        if self.count - ddof <= 0:
+            raise ValueError('not enough replicates for ddof=' + str(ddof))
+
+        return self.m2 / (self.count - ddof)
+
+    def get_std(self, ddof=0):
+        """
+        :param ddof: Delta degrees of freedom; 0 matches numpy.std, as used by the notebook
+        :return: Array of the standard deviation of each (time step, status) count.
+        """
+        return np.sqrt(self.get_variance(ddof))
+
+    def get_metrics(self, step):
+        """
+        Formats the statistics for one time step in the same way as the notebook's get_metrics().
+        :param step: Time step
+        :return: List of (status, mean, standard deviation) tuples, in the order R, S, I, Q, D.
+        """
+        std = self.get_std()
+
+        return [(status, float(self.mean[step, Counts.columns[status]]), float(std[step, Counts.columns[status]]))
+                for status in ['R', 'S', 'I', 'Q', 'D']]
+
+
+class StreamingQuantiles:
+    """
+    Defines an aggregator which estimates quantiles of every (time step, status) count across replicates, such as the
+    5/50/95 percentile bands of a fan chart, without keeping the replicates. Each quantile of each count is tracked by
+    the P-squared algorithm (Jain and Chlamtac, 1985), which keeps 5 markers whose heights are adjusted with piecewise
+    parabolic interpolation as observations arrive; the middle marker is the estimate. All markers are updated with
+    whole-array operations, so each replicate costs the same few array operations regardless of the number of time
+    steps. Until 5 replicates have been added, the quantiles are calculated exactly from the stored replicates.
+
+    Fields:
+
+        probabilities:  array of the probabilities of the tracked quantiles, between 0 and 1
+
+        count:          the number of replicates added
+
+        heights:        float array of shape (5, len(probabilities), (num_steps + 1) * 5) holding the marker heights
+
+        positions:      float array of the same shape holding the actual marker positions
+
+        desired:        float array of shape (5, len(probabilities), 1) holding the desired marker positions
+
+        increments:     float array of the same shape holding the change in desired positions for each observation
+
+        initial:        list of the first replicates, used until the markers are initialized
+
+        shape:          shape of the counts of a single replicate
+    """
+
+    num_markers = 5
+
+    def __init__(self, probabilities=(0.05, 0.5, 0.95)):
+        """
+        Initializes StreamingQuantiles with no replicates.
+        :param probabilities: Probabilities of the quantiles to track, between 0 and 1
+        """
+        self.probabilities = np.array(probabilities, dtype=np.float64)
+        if ((self.probabilities <= 0) | (self.probabilities >= 1)).any():
+            raise ValueError('probabilities must be between 0 and 1')
+
+        self.count = 0
+        self.heights = None
+        self.positions = None
+        self.desired = None
+        self.increments = None
+        self.initial = []
+        self.shape = None
+
+    def update(self, counts):
+        """
+        Adds one replicate.
+        :param counts: Array of shape (num_steps + 1, 5), or Counts, holding the counts of one replicate
+        :return: None
+        """
+        if isinstance(counts, Counts):
+            counts = counts.array
+
+        counts = np.asarray(counts, dtype=np.float64)
+
+        if self.shape is None:
+            self.shape = counts.shape
+        elif counts.shape != self.shape:
+            raise ValueError('counts must have shape ' + str(self.shape))
+
+        self.count += 1
+        x = counts.reshape(-1)
+
+        if self.count <= self.num_markers:
+            self.initial.append(x)
+            if self.count == self.num_markers:
+                self.initialize_markers()
+            return
+
+        self.add_observation(x)
+
+    def update_batch(self, batch):
+        """
+        Adds several replicates, such as a chunk yielded by iter_replicates().
+        :param batch: Array of shape (num_replicates, num_steps + 1, 5)
+        :return: None
+        """
+        for counts in batch:
+            self.update(counts)
+
+    def initialize_markers(self):
+        """
+        Sets the markers from the first 5 replicates.
+        :return: None
+        """
+        p = self.probabilities[None, :, None]
+        num_probabilities = len(self.probabilities)
+
+        observations = np.sort(np.array(self.initial), axis=0)  # shape (5, cells)
+        self.heights = np.repeat(observations[:, None, :], num_probabilities, axis=1)
+        self.positions = np.repeat(np.arange(1.0, 6.0)[:, None, None], num_probabilities, axis=1) * \
+            np.ones_like(self.heights)
+
+        self.desired = np.concatenate([np.ones_like(p), 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5 * np.ones_like(p)])
+        self.increments = np.concatenate([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+        self.initial = []
+
+    def add_observation(self, x):
+        """
+        Adds one observation of every count and adjusts the markers.
+        :param x: Array of the counts of one replicate, flattened
+        :return: None
+        """
+        q = self.heights
+        n = self.positions
+
+        # extend the extreme markers, then find the cell of x between the markers
+        np.minimum(q[0], x, out=q[0])
+        np.maximum(q[4], x, out=q[4])
+        k = (x >= q[1]).astype(np.int8) + (x >= q[2]) + (x >= q[3])
+
+        for i in range(1, self.num_markers):
+            n[i] += k < i
+        self.desired += self.increments
+
+        # adjust the middle markers, each in turn, if they are off their desired positions
+        for i in range(1, self.num_markers - 1):
+            d = self.desired[i] - n[i]
+            up = (d >= 1) & (n[i + 1] - n[i] > 1)
+            down = (d <= -1) & (n[i - 1] - n[i] < -1)
+            move = up | down
+            if not move.any():
+                continue
+
+            s = np.where(up, 1.0, -1.0)
+            parabolic = q[i] + s / (n[i + 1] - n[i - 1]) * (
+                (n[i] - n[i - 1] + s) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                (n[i + 1] - n[i] - s) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+            # fall back to linear interpolation if the parabola overshoots a neighbor
+            neighbor_height = np.where(up, q[i + 1], q[i - 1])
+            neighbor_position = np.where(up, n[i + 1], n[i - 1])
+            linear = q[i] + s * (neighbor_height - q[i]) / (neighbor_position - n[i])
+            height = np.where((q[i - 1] < parabolic) & (parabolic < q[i + 1]), parabolic, linear)
+
+            q[i] = np.where(move, height, q[i])
+            n[i] = np.where(move, n[i] + s, n[i])
+
+    def get_quantiles(self):
+        """
+        :return: Array of shape (len(probabilities), num_steps + 1, 5) holding the estimated quantiles of each
+        (time step, status) count.
+        """
+        if self.count == 0:
+            raise ValueError('no replicates have been added')
+
+        if self.count < self.num_markers:
+            quantiles = np.quantile(np.array(self.initial), self.probabilities, axis=0)
+        else:
+            quantiles = self.heights[2]
+
+        return quantiles.reshape((len(self.probabilities),) + self.shape)
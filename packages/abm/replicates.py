@@ -0,0 +1,201 @@
+"""
+Defines functionality for running many replicates of a simulation, optionally spread over a pool of worker processes.
+
+Each replicate is given its own seed, derived from a single root seed, and every model draws only from streams derived
+from its seed, so results are bit-identical whether replicates run serially or in worker processes, and do not depend
+on how replicates are divided into chunks. Results are returned as integer arrays of shape
+(num_replicates, num_steps + 1, 5), where the last axis follows the status order in Counts.statuses. Each replicate
+writes its counts directly into its slice of the chunk array, so no per-step objects are created or copied.
+
+If a ResultsCache is given, the results of each replicate are stored under a key derived from the model class,
+parameters, number of steps, replicate seed and code version. As the seed of each replicate does not depend on the
+number of replicates, only the replicates missing from the cache are run, so a set of replicates can be extended or
+reused in part. Runs without a root seed are never cached.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from packages.abm.abm import ABM
+from packages.abm.counts import Counts
+from packages.abm.replicate_statistics import RunningStatistics
+
+
+def counts_to_array(counts):
+    """
+    Converts counts, either a Counts buffer or a list of count dictionaries, to an integer array.
+    :param counts: Counts or list of dictionaries of metrics, one for each time step
+    :return: Array of shape (len(counts), 5) with columns in the order of Counts.statuses.
+    """
+    if isinstance(counts, Counts):
+        return np.array(counts.array)
+
+    return np.array([[each[status] for status in Counts.statuses] for each in counts], dtype=Counts.dtype)
+
+
+def get_replicate_seeds(seed, num_replicates):
+    """
+    Derives an independent seed for each replicate from a single root seed. The seeds are derived from the spawn key
+    of the root seed without modifying it, as in spawn_streams(), so the same root seed always gives the same
+    replicate seeds.
+    :param seed: Root seed (int, numpy.random.SeedSequence or None for fresh entropy)
+    :param num_replicates: Number of replicate seeds to derive
+    :return: List of numpy.random.SeedSequence, one for each replicate.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    return [np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,), pool_size=seed.pool_size)
+            for i in range(num_replicates)]
+
+
+def run_replicate_chunk(engine, model_args, num_steps, seeds):
+    """
+    Runs one replicate for each of the given seeds. Used as the task executed by each worker process.
+    :param engine: Model class, such as ABM or VectorizedABM
+    :param model_args: Tuple of constructor arguments for the model
+    :param num_steps: Number of time steps to run each replicate
+    :param seeds: List of numpy.random.SeedSequence, one for each replicate in the chunk
+    :return: Array of shape (len(seeds), num_steps + 1, 5) containing the counts of each replicate.
+    """
+    results = np.zeros((len(seeds), num_steps + 1, len(Counts.statuses)), dtype=Counts.dtype)
+
+    for i, replicate_seed in enumerate(seeds):
+        model = engine(*model_args, seed=replicate_seed)
+        model.counts = Counts(buffer=results[i])  # fill this replicate's slice in place
+        model.run_simulation(num_steps)
+
+    return results
+
+
+def iter_replicates(num_replicates, num_steps, n, m, num_infected, percent_distancing, percent_mask,
+                    percent_vaccinated=0.0, seed=None, num_workers=None, chunk_size=None, engine=ABM, cache=None):
+    """
+    Runs replicates of a simulation and yields their counts in chunks, in replicate order.
+
+    :param num_replicates: the number of full simulations to execute
+    :param num_steps: the number of time steps to run the model
+    :param n: the dimension of the square torus grid used to define the world in which Agents move
+    :param m: the number of Agents in the model
+    :param num_infected: the number of Agents which have an infected status upon initialization
+    :param percent_distancing: the percent of Agents which are distancing upon initialization
+    :param percent_mask: the percent of Agents which are masked upon initialization
+    :param percent_vaccinated: the percent of Agents which have a recovered status upon initialization
+    :param seed: root seed from which every replicate's seed is derived; None for fresh entropy
+    :param num_workers: number of worker processes; defaults to the number of CPUs. If 1, replicates are run in this
+    process.
+    :param chunk_size: number of replicates per chunk; defaults to splitting the replicates into about 4 chunks per
+    worker
+    :param engine: model class to simulate, such as ABM or VectorizedABM
+    :param cache: optional ResultsCache from which replicates are read, if present, and in which the results of each
+    replicate that is run are stored
+    :return: Generator of arrays of shape (chunk_size, num_steps + 1, 5). The last chunk may be smaller.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(num_replicates / (num_workers * 4)))
+
+    model_args = (n, m, num_infected, percent_distancing, percent_mask, percent_vaccinated)
+    seeds = get_replicate_seeds(seed, num_replicates)
+
+    if cache is None or seed is None:
+        yield from run_chunks(engine, model_args, num_steps, seeds, num_workers, chunk_size)
+        return
+
+    parameters = {'model_args': list(model_args), 'num_steps': num_steps}
+    keys = [cache.get_key(engine, parameters, replicate_seed) for replicate_seed in seeds]
+    cached = [cache.get(key) for key in keys]
+
+    # run only the replicates missing from the cache, in replicate order
+    missing = [i for i in range(num_replicates) if cached[i] is None]
+    computed = (replicate for results in run_chunks(engine, model_args, num_steps, [seeds[i] for i in missing],
+                                                    num_workers, chunk_size)
+                for replicate in results)
+
+    for start in range(0, num_replicates, chunk_size):
+        results = np.zeros((min(chunk_size, num_replicates - start), num_steps + 1, len(Counts.statuses)),
+                           dtype=Counts.dtype)
+
+        for i in range(start, start + len(results)):
+            if cached[i] is None:
+                results[i - start] = next(computed)
+                cache.put(keys[i], results[i - start])
+            else:
+                results[i - start] = cached[i]
+
+        yield results
+
+
+def run_chunks(engine, model_args, num_steps, seeds, num_workers, chunk_size):
+    """
+    Runs one replicate for each seed, in chunks of chunk_size replicates.
+    :param engine: Model class, such as ABM or VectorizedABM
+    :param model_args: Tuple of constructor arguments for the model
+    :param num_steps: Number of time steps to run each replicate
+    :param seeds: List of numpy.random.SeedSequence, one for each replicate
+    :param num_workers: Number of worker processes. If 1, replicates are run in this process.
+    :param chunk_size: Number of replicates per chunk
+    :return: Generator of arrays of shape (chunk_size, num_steps + 1, 5), in replicate order.
+    """
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+
+    if num_workers == 1:
+        for chunk in chunks:
+            yield run_replicate_chunk(engine, model_args, num_steps, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(run_replicate_chunk, engine, model_args, num_steps, chunk) for chunk in chunks]
+
+        # yield in submission order so results are deterministic
+        for future in futures:
+            yield future.result()
+
+
+def empty_results(num_steps):
+    """
+    :param num_steps: Number of time steps
+    :return: Array of shape (0, num_steps + 1, 5) for a set of zero replicates.
+    """
+    return np.zeros((0, num_steps + 1, len(Counts.statuses)), dtype=Counts.dtype)
+
+
+def run_replicates(num_replicates, num_steps, n, m, num_infected, percent_distancing, percent_mask,
+                   percent_vaccinated=0.0, seed=None, num_workers=None, chunk_size=None, engine=ABM, cache=None):
+    """
+    Runs replicates of a simulation and returns the counts of all replicates. See iter_replicates() for parameters.
+
+    :return: Array of shape (num_replicates, num_steps + 1, 5) containing the counts of each replicate.
+    """
+    chunks = list(iter_replicates(num_replicates, num_steps, n, m, num_infected, percent_distancing, percent_mask,
+                                  percent_vaccinated, seed, num_workers, chunk_size, engine, cache))
+
+    if not chunks:
+        return empty_results(num_steps)
+
+    return np.concatenate(chunks)
+
+
+def summarize_replicates(num_replicates, num_steps, n, m, num_infected, percent_distancing, percent_mask,
+                         percent_vaccinated=0.0, seed=None, num_workers=None, chunk_size=None, engine=ABM, cache=None,
+                         aggregators=()):
+    """
+    Runs replicates of a simulation and aggregates their counts as each chunk finishes, without keeping the counts of
+    every replicate. See iter_replicates() for other parameters.
+
+    :param aggregators: Additional aggregators providing update_batch(), such as StreamingQuantiles, which are given
+    every chunk along with the returned RunningStatistics
+    :return: RunningStatistics holding the mean and variance of each (time step, status) count across replicates.
+    """
+    statistics = RunningStatistics()
+
+    for chunk in iter_replicates(num_replicates, num_steps, n, m, num_infected, percent_distancing, percent_mask,
+                                 percent_vaccinated, seed, num_workers, chunk_size, engine, cache):
+        statistics.update_batch(chunk)
+        for aggregator in aggregators:
+            aggregator.update_batch(chunk)
+
+    return statistics
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+def get_code_version():
+    """
+    Calculates a version identifier for the simulation code, so that cached results are not reused after the code
+    changes.
+    :return: Hex digest of the contents of every module in this package.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
+
+class ResultsCache:
+    """
+    Defines an on-disk cache of simulation results. Each result is a count array stored in its own .npy file, named by
+    a hash of the model class, parameters, seed and code version, so identical requests map to the same file and any
+    change to the code gives new names.
+
+    The total size of the cache is bounded. Reading a result marks its file as recently used, and when the cache grows
+    beyond max_bytes the least recently used files are deleted.
+
+    Fields:
+
+        directory:      directory holding the cached results; created if it does not exist
+
+        max_bytes:      largest total size of the cached files
+
+        code_version:   identifier of the simulation code included in every key; see get_code_version()
+    """
+
+    suffix = '.npy'
+
+    def __init__(self, directory, max_bytes=2 ** 30, code_version=None):
+        """
+        Initializes ResultsCache.
+        :param directory: Directory holding the cached results
+        :param max_bytes: Largest total size of the cached files
+        :param code_version: Identifier of the simulation code. Defaults to get_code_version().
+        """
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.code_version = get_code_version() if code_version is None else code_version
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_key(self, engine, parameters, seed):
+        """
+        Calculates the key under which results are stored.
+        :param engine: Model class, such as ABM or VectorizedABM
+        :param parameters: Dictionary of the parameters which determine the results; values must be JSON serializable
+        :param seed: int or numpy.random.SeedSequence used for the run, such as the seed of a single replicate. None
+        (fresh entropy) cannot be cached. Replicate seeds are derived from the spawn key without spawning (see
+        get_replicate_seeds), so children already spawned from a SeedSequence do not change its results and are not
+        part of the key.
+        :return: Hex digest key, or None if the results are not reproducible.
+        """
+        if seed is None:
+            return None
+
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+
+        identity = {'engine': engine.__module__ + '.' + engine.__qualname__,
+                    'parameters': parameters,
+                    'seed': {'entropy': seed.entropy, 'spawn_key': list(seed.spawn_key), 'pool_size': seed.pool_size},
+                    'code_version': self.code_version}
+
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def get_path(self, key):
+        """
+        :param key: Key from get_key()
+        :return: Path of the file for key.
+        """
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """
+        Reads the results stored under key and marks them as recently used.
+        :param key: Key from get_key()
+        :return: Array of results, or None if key is not in the cache.
+        """
+        path = self.get_path(key)
+
+        try:
+            results = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None  # missing, incomplete or just evicted
+
+        return results
+
+    def put(self, key, results):
+        """
+        Stores results under key, then evicts least recently used results if the cache is too large. The file is
+        written in full before it becomes visible under key.
+        :param key: Key from get_key()
+        :param results: Array of results
+        :return: None
+        """
+        path = self.get_path(key)
+        temp_path = path + '.' + str(os.getpid()) + '.tmp'
+
+        with open(temp_path, 'wb') as f:
+            np.save(f, results)
+        os.replace(temp_path, path)
+
+        self.evict()
+
+    def get_entries(self):
+        """
+        :return: List of (last used time, size, path) for every cached file, least recently used first.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.suffix):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # removed by another process
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        return sorted(entries)
+
+    def get_size(self):
+        """
+        :return: Total size in bytes of the cached files.
+        """
+        return sum(size for last_used, size, path in self.get_entries())
+
+    def evict(self):
+        """
+        Deletes the least recently used files until the total size is at most max_bytes.
+        :return: None
+        """
+        entries = self.get_entries()
+        total = sum(size for last_used, size, path in entries)
+
+        for last_used, size, path in entries:
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # removed by another process
+            total -= size
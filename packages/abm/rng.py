@@ -0,0 +1,129 @@
+import itertools
+import operator
+
+import numpy as np
+
+
+class BlockRNG:
+    """
+    Defines a random number provider which draws uniform variates from a numpy.random.Generator in large blocks and
+    hands them out one at a time. Provides random() and randint(a, b) with the same meaning as the functions of the
+    random module, so either this provider or the random module itself can be given to Agent, AgentGenerator and
+    AgentMover as the source of their random decisions.
+
+    Fields:
+
+        generator:  numpy.random.Generator from which blocks of variates are drawn
+
+        block_size: the number of variates drawn from generator at a time
+
+        random:     function which returns the next uniform variate in [0, 1). It is bound directly to the iterator over
+                    the buffered blocks, so each call costs about the same as random.random()
+
+        values:     list of the variates in the current block
+
+        block:      iterator over the unused variates in the current block
+    """
+
+    def __init__(self, generator=None, block_size=4096):
+        """
+        Initializes BlockRNG.
+        :param generator: numpy.random.Generator, or a seed (int, numpy.random.SeedSequence or None for fresh entropy)
+        used to create one.
+        :param block_size: The number of variates to draw from generator at a time.
+        """
+        if not isinstance(generator, np.random.Generator):
+            generator = np.random.default_rng(generator)
+
+        self.generator = generator
+        self.block_size = block_size
+        self.start_stream([])
+
+    def draw_blocks(self):
+        """
+        Draws blocks of uniform variates from generator as they are needed.
+        :return: Generator of iterators, one for each block.
+        """
+        while True:
+            self.values = self.generator.random(self.block_size).tolist()
+            self.block = iter(self.values)
+            yield self.block
+
+    def start_stream(self, pending):
+        """
+        Starts handing out the pending variates, followed by new blocks drawn from generator.
+        :param pending: List of variates to hand out before drawing a new block
+        :return: None
+        """
+        self.values = list(pending)
+        self.block = iter(self.values)
+
+        stream = itertools.chain.from_iterable(itertools.chain([self.block], self.draw_blocks()))
+        self.random = stream.__next__
+
+    def randint(self, a, b):
+        """
+        Returns a random integer N such that a <= N <= b, consuming a single variate.
+        :param a: Lower bound
+        :param b: Upper bound
+        :return: Random integer in [a, b].
+        """
+        return a + int(self.random() * (b - a + 1))
+
+    def get_state(self):
+        """
+        Captures the state of the provider so that the same sequence of variates can be reproduced later.
+        :return: Dictionary containing the generator state and the unused variates of the current block.
+        """
+        num_pending = operator.length_hint(self.block)
+        return {'generator': self.generator.bit_generator.state,
+                'pending': self.values[len(self.values) - num_pending:]}
+
+    def set_state(self, state):
+        """
+        Restores a state captured by get_state().
+        :param state: Dictionary returned by get_state()
+        :return: None
+        """
+        self.generator.bit_generator.state = state['generator']
+        self.start_stream(state['pending'])
+
+    def __getstate__(self):
+        """
+        Captures the provider for pickle and copy, which cannot handle the iterators behind random().
+        :return: Dictionary containing generator, block_size and the state from get_state().
+        """
+        return {'generator': self.generator, 'block_size': self.block_size, 'state': self.get_state()}
+
+    def __setstate__(self, state):
+        """
+        Restores a provider captured by __getstate__().
+        :param state: Dictionary returned by __getstate__()
+        :return: None
+        """
+        self.generator = state['generator']
+        self.block_size = state['block_size']
+        self.set_state(state['state'])
+
+
+# independent random streams used by a model, one for each subsystem
+stream_names = ['generation', 'placement', 'progression', 'movement']
+
+
+def spawn_streams(seed, names=stream_names):
+    """
+    Derives an independent BlockRNG for each named subsystem from a single seed. The streams are derived from the spawn
+    key of the seed without modifying it, so the same seed always gives the same streams.
+    :param seed: int, numpy.random.SeedSequence, or None for fresh entropy
+    :param names: List of names of the streams to derive
+    :return: Dictionary mapping each name to its BlockRNG.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+
+    streams = {}
+    for i, name in enumerate(names):
+        child = np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,), pool_size=seed.pool_size)
+        streams[name] = BlockRNG(np.random.default_rng(child))
+
+    return streams
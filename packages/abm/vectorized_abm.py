@@ -0,0 +1,489 @@
+import time
+
+import numpy as np
+
+from packages.abm.abm import ABM, StepSnapshot
+from packages.abm.agent import Agent
+from packages.abm.agent_generator import AgentGenerator
+from packages.abm.agent_mover import AgentMover
+from packages.abm.counts import Counts, CountsRow
+from packages.abm.rng import spawn_streams
+
+
+class VectorizedABM:
+    """
+    Defines the same agent-based SIR model as ABM, but stores Agent properties as NumPy arrays (one element per Agent)
+    and performs infection, disease progression, death and counting as whole-array operations. Takes the same
+    constructor arguments and returns counts in the same format as ABM, so either engine can be used for a simulation.
+
+    Unlike ABM, which updates Agents one after another, all Agents in a time step are updated from the statuses at the
+    start of that time step. Movement follows the same rules as AgentMover and is performed either one Agent at a time
+    or, in checkerboard mode, one color class at a time as whole-array operations.
+
+    Fields:
+
+        x, y:           arrays of the grid position of each Agent
+
+        status:         array of status codes for each Agent, where each code is the index of the status in
+                        Agent.statuses
+
+        mask:           boolean array, True if the Agent is masked
+
+        distancing:     boolean array, True if the Agent is physically distancing
+
+        asymptomatic:   boolean array, True if the Agent is asymptomatic when infected
+
+        days_infected:  array of how long each Agent has been infected, if currently infected
+
+        alive:          boolean array, False once the Agent has died
+
+        occupant:       n x n array containing the index of the Agent at each position, or -1 if the position is empty
+
+        counts:         Counts buffer holding the metrics gathered for each time step, in the same format as ABM.counts
+
+        num_dead:       the number of Agents which have died by the current time step
+
+        current_step:   the number of time steps run so far
+
+        baseline_counted: True once iter_steps has yielded the initial state, which happens only once even if no steps
+                        are run
+
+        movement:       'sequential' or 'checkerboard'; see ABM.movement
+
+        profiler:       Profiler which times the phases of each time step, or None to skip profiling
+
+        rngs:           dictionary of independent BlockRNG streams derived from the seed, one for each of generation,
+                        placement, progression and movement; progression and movement draw arrays directly from the
+                        numpy.random.Generator of their stream
+    """
+
+    # status codes
+    R, S, I, Q = (Agent.statuses.index(status) for status in ['R', 'S', 'I', 'Q'])
+
+    def __init__(self, n, m, num_infected, percent_distancing, percent_mask, percent_vaccinated=0.0, seed=None,
+                 movement='sequential', profiler=None, progression='scheduled'):
+        """
+
+        :param n: the dimension of the square torus grid used to define the world in which Agents move
+        :param m: the number of Agents in the model
+        :param num_infected: the number of Agents which have an infected status upon initialization
+        :param percent_distancing: the percent of Agents which have a quarantine status upon initialization
+        :param percent_mask: the percent of Agents which are masked upon initialization
+        :param percent_vaccinated: the percent of Agents which have a recovered status upon initialization
+        :param seed: int or numpy.random.SeedSequence from which every random stream is derived; the same seed gives
+        identical counts. None for fresh entropy.
+        :param movement: 'sequential' or 'checkerboard'
+        :param profiler: Optional Profiler; see profiler field
+        :param progression: 'sweep' or 'scheduled'; see ABM.progression. Validated for compatibility with ABM, but does
+        not change results, as VectorizedABM always updates every Agent with whole-array operations
+        """
+        self.n = n
+        self.m = m
+        self.movement = movement
+        self.profiler = profiler
+
+        # validate
+        if m > n * n:
+            raise ValueError('n x n grid cannot hold all agents')
+        if movement not in ABM.movement_modes:
+            raise ValueError('movement must be one of ' + str(ABM.movement_modes))
+        if progression not in ABM.progression_modes:
+            raise ValueError('progression must be one of ' + str(ABM.progression_modes))
+
+        self.rngs = spawn_streams(seed)
+
+        # generate and position agents
+        ag = AgentGenerator(self.m, num_infected, percent_distancing, percent_mask, percent_vaccinated,
+                            self.rngs['generation'], self.rngs['progression'])
+        properties = ag.generate_arrays()
+        am = AgentMover(self.n, rng=self.rngs['placement'])
+        positions = np.array(am.get_positions(properties['distancing'].tolist()), dtype=np.int64).reshape(m, 2)
+
+        # store agent properties as arrays
+        self.x = positions[:, 0].copy()
+        self.y = positions[:, 1].copy()
+        self.status = properties['status']
+        self.mask = properties['mask']
+        self.distancing = properties['distancing']
+        self.asymptomatic = properties['asymptomatic']
+        self.days_infected = np.zeros(m, dtype=np.int16)
+        self.alive = np.ones(m, dtype=bool)
+
+        self.occupant = np.full((n, n), -1, dtype=np.int64)
+        self.occupant[self.x, self.y] = np.arange(m)
+
+        self.counts = Counts()
+        self.num_dead = 0
+        self.current_step = 0
+        self.baseline_counted = False
+
+    def get_counts(self):
+        """
+        Counts the number of living Agents with each status.
+        :return: Dictionary of the current metrics, keyed by status.
+        """
+        totals = np.bincount(self.status[self.alive], minlength=len(Agent.statuses))
+        return {'R': int(totals[self.R]), 'D': self.num_dead, 'I': int(totals[self.I]), 'S': int(totals[self.S]),
+                'Q': int(totals[self.Q])}
+
+    def add_counts(self):
+        """
+        Adds a row of the current metrics to counts.
+        :return: None
+        """
+        counts = self.get_counts()
+        self.counts.append([counts[status] for status in Counts.statuses])
+
+    def remove_dead_agents(self):
+        """
+        Determines which infected or quarantined Agents die in this time step and removes them from the grid.
+        :return: Array of indexes of the Agents which died.
+        """
+        infected = np.flatnonzero(self.alive & ((self.status == self.I) | (self.status == self.Q)))
+        died = infected[self.rngs['progression'].generator.random(len(infected)) < Agent.death_rate]
+
+        self.alive[died] = False
+        self.occupant[self.x[died], self.y[died]] = -1
+        self.num_dead += len(died)
+
+        return died
+
+    def find_new_infections(self):
+        """
+        Determines which susceptible Agents become infected in this time step. Infected adjacent Agents are counted by
+        mask pairing, and a single draw is made for each exposed susceptible Agent against the combined probability
+        given by Agent.infection_probability.
+        :return: Array of indexes of the newly infected Agents.
+        """
+        susceptible = np.flatnonzero(self.alive & (self.status == self.S))
+        x = self.x[susceptible]
+        y = self.y[susceptible]
+        masked = self.mask[susceptible].astype(np.int64)
+
+        # number of infected adjacent agents, by number of masked agents in the pair
+        exposures = np.zeros((3, len(susceptible)), dtype=np.int64)
+
+        for x_change, y_change in AgentMover.directions:
+            adjacent = self.occupant[(x + x_change) % self.n, (y + y_change) % self.n]
+            occupied = adjacent >= 0
+            adjacent = np.where(occupied, adjacent, 0)  # placeholder index for empty positions
+
+            exposed = occupied & (self.status[adjacent] == self.I)
+            pairing = masked + self.mask[adjacent]
+            np.add.at(exposures, (pairing[exposed], np.flatnonzero(exposed)), 1)
+
+        # single draw for each exposed agent
+        exposed = np.flatnonzero(exposures.sum(axis=0) > 0)
+        p = Agent.infection_probability(exposures[0, exposed], exposures[1, exposed], exposures[2, exposed])
+        infected = exposed[self.rngs['progression'].generator.random(len(exposed)) < p]
+
+        return susceptible[infected]
+
+    def progress_infections(self):
+        """
+        Advances days_infected for infected and quarantined Agents, moves symptomatic Agents into quarantine after 2
+        days and moves Agents to recovered after 14 days.
+        :return: None
+        """
+        infected = self.alive & ((self.status == self.I) | (self.status == self.Q))
+        self.days_infected[infected] += 1
+
+        quarantined = infected & (self.status == self.I) & (self.days_infected > 2) & ~self.asymptomatic
+        self.status[quarantined] = self.Q
+
+        recovered = infected & (self.days_infected > 14)
+        self.status[recovered] = self.R
+        self.days_infected[recovered] = 0
+        self.asymptomatic[recovered] = False
+
+    def infect_agents(self, agents):
+        """
+        Sets status of the given Agents to infected and determines whether each is asymptomatic.
+        :param agents: Array of indexes of Agents to infect
+        :return: None
+        """
+        self.status[agents] = self.I
+        self.asymptomatic[agents] = self.rngs['progression'].generator.random(len(agents)) < Agent.asymptomatic_rate
+
+    def get_available_positions(self, x_curr, y_curr, distancing, index, occupant, distancing_list):
+        """
+        Calculates the positions to which the given Agent can move, following the same rules as
+        AgentMover.get_available_positions.
+        :param x_curr: Current x position of the Agent
+        :param y_curr: Current y position of the Agent
+        :param distancing: True if the Agent is distancing
+        :param index: Index of the Agent being considered
+        :param occupant: 2D list form of the occupant grid
+        :param distancing_list: List form of the distancing array
+        :return: List of available (i,j) positions
+        """
+        n = self.n
+
+        avail = []
+        for x_change, y_change in AgentMover.directions:
+            x_next = (x_curr + x_change) % n
+            y_next = (y_curr + y_change) % n
+
+            if occupant[x_next][y_next] >= 0:
+                continue  # occupied
+
+            # check every agent surrounding the position
+            ok = True
+            for a_change, b_change in AgentMover.directions:
+                other = occupant[(x_next + a_change) % n][(y_next + b_change) % n]
+                if other < 0 or other == index:
+                    continue
+
+                if distancing or distancing_list[other]:
+                    ok = False  # breaches distancing
+                    break
+
+            if ok:
+                avail.append((x_next, y_next))
+
+        return avail
+
+    def move_all_agents(self):
+        """
+        Moves every living Agent, using the movement mode of the model.
+        :return: None
+        """
+        if self.movement == 'checkerboard':
+            self.move_all_agents_checkerboard()
+        else:
+            self.move_all_agents_sequential()
+
+    def move_all_agents_sequential(self):
+        """
+        Selects and moves each living Agent in turn. Works on Python list copies of the position arrays and occupant
+        grid, which are much faster than NumPy arrays for one element at a time access.
+        :return: None
+        """
+        occupant = self.occupant.tolist()
+        x = self.x.tolist()
+        y = self.y.tolist()
+        distancing = self.distancing.tolist()
+
+        alive = np.flatnonzero(self.alive)
+        choices = self.rngs['movement'].generator.random(len(alive)).tolist()
+
+        for index, u in zip(alive.tolist(), choices):
+            avail = self.get_available_positions(x[index], y[index], distancing[index], index, occupant, distancing)
+
+            if avail:
+                x_next, y_next = avail[int(u * len(avail))]
+                occupant[x[index]][y[index]] = -1
+                occupant[x_next][y_next] = index
+                x[index] = x_next
+                y[index] = y_next
+
+        self.occupant = np.array(occupant, dtype=np.int64)
+        self.x = np.array(x, dtype=np.int64)
+        self.y = np.array(y, dtype=np.int64)
+
+    def count_adjacent(self, occupied):
+        """
+        Counts, for every position, how many of the 8 surrounding positions are marked in occupied.
+        :param occupied: n x n boolean array
+        :return: n x n integer array of counts.
+        """
+        counts = np.zeros((self.n, self.n), dtype=np.int64)
+
+        for x_change, y_change in AgentMover.directions:
+            counts += np.roll(occupied, (x_change, y_change), axis=(0, 1))
+
+        return counts
+
+    def update_adjacent_counts(self, adjacent_agents, adjacent_distancing, agents, change):
+        """
+        Adds change to the adjacent counts of every position surrounding the given Agents.
+        :param adjacent_agents: n x n array of the number of Agents adjacent to each position
+        :param adjacent_distancing: n x n array of the number of distancing Agents adjacent to each position
+        :param agents: Array of indexes of the Agents being added or removed
+        :param change: 1 if the Agents are being added, -1 if they are being removed
+        :return: None
+        """
+        distancing = agents[self.distancing[agents]]
+
+        for x_change, y_change in AgentMover.directions:
+            np.add.at(adjacent_agents, ((self.x[agents] + x_change) % self.n, (self.y[agents] + y_change) % self.n),
+                      change)
+            np.add.at(adjacent_distancing,
+                      ((self.x[distancing] + x_change) % self.n, (self.y[distancing] + y_change) % self.n), change)
+
+    def move_all_agents_checkerboard(self):
+        """
+        Moves every living Agent, one color class at a time (see AgentMover.get_color_classes). Agents in the same class
+        are at least AgentMover.sweep_separation positions apart, so the moves of the whole class are selected and
+        applied as whole-array operations. The number of Agents and distancing Agents adjacent to each position are
+        kept up to date between classes, and follow the same rules as AgentMover.get_grid_available_positions.
+        :return: None
+        """
+        n = self.n
+        directions = np.array(AgentMover.directions)
+        colors = np.array(AgentMover(n).get_axis_colors())
+
+        occupied = self.occupant >= 0
+        adjacent_agents = self.count_adjacent(occupied)
+        adjacent_distancing = self.count_adjacent(occupied & self.distancing[np.where(occupied, self.occupant, 0)])
+
+        alive = np.flatnonzero(self.alive)
+        agent_colors = colors[self.x[alive]] * len(colors) + colors[self.y[alive]]
+        order = np.argsort(agent_colors, kind='stable')
+        classes = np.split(alive[order], np.flatnonzero(np.diff(agent_colors[order])) + 1)
+        choices = self.rngs['movement'].generator.random(len(alive))
+
+        start = 0
+        for agents in classes:
+            u = choices[start:start + len(agents)]
+            start += len(agents)
+
+            # surrounding positions of each agent in the class, with shape (len(agents), 8)
+            x_next = (self.x[agents, None] + directions[:, 0]) % n
+            y_next = (self.y[agents, None] + directions[:, 1]) % n
+            distancing = self.distancing[agents, None]
+
+            # discount each agent's own contribution to the adjacent counts
+            avail = ((self.occupant[x_next, y_next] < 0)
+                     & (adjacent_distancing[x_next, y_next] <= distancing)
+                     & ~(distancing & (adjacent_agents[x_next, y_next] > 1)))
+
+            num_avail = avail.sum(axis=1)
+            moving = num_avail > 0
+            if not moving.any():
+                continue
+
+            # select a random available position for each moving agent
+            selected = (u[moving] * num_avail[moving]).astype(np.int64)
+            column = np.argmax(np.cumsum(avail[moving], axis=1) > selected[:, None], axis=1)
+            agents = agents[moving]
+            rows = np.arange(len(agents))
+
+            self.occupant[self.x[agents], self.y[agents]] = -1
+            self.update_adjacent_counts(adjacent_agents, adjacent_distancing, agents, -1)
+
+            self.x[agents] = x_next[moving][rows, column]
+            self.y[agents] = y_next[moving][rows, column]
+
+            self.occupant[self.x[agents], self.y[agents]] = agents
+            self.update_adjacent_counts(adjacent_agents, adjacent_distancing, agents, 1)
+
+    def step(self):
+        """
+        Performs a single time step: death, infection, disease progression and movement. If a profiler is set, each of
+        these is timed as a separate phase.
+        :return: None
+        """
+        if self.profiler is not None:
+            self.profile_step()
+            return
+
+        self.remove_dead_agents()
+        new_infections = self.find_new_infections()
+        self.progress_infections()
+        self.infect_agents(new_infections)
+        self.move_all_agents()
+
+    def profile_step(self):
+        """
+        Performs the same time step as step, timing the death check, infection check, disease progression and movement
+        phases with the profiler.
+        :return: None
+        """
+        profiler = self.profiler
+        clock = time.perf_counter
+
+        start = clock()
+        self.remove_dead_agents()
+        checked = clock()
+        new_infections = self.find_new_infections()
+        infected = clock()
+        self.progress_infections()
+        self.infect_agents(new_infections)
+        progressed = clock()
+        self.move_all_agents()
+        moved = clock()
+
+        profiler.add_time('death_check', checked - start)
+        profiler.add_time('infection', infected - checked)
+        profiler.add_time('progression', progressed - infected)
+        profiler.add_time('movement', moved - progressed)
+        profiler.num_steps += 1
+
+    def get_snapshot(self, changed=None):
+        """
+        Captures the current step and metrics of the model.
+        :param changed: Array of indexes of the Agents whose status changed during the step, or None if changes were
+        not tracked
+        :return: StepSnapshot
+        """
+        counts = self.get_counts()
+        return StepSnapshot(self.current_step,
+                            CountsRow(np.array([counts[status] for status in Counts.statuses], dtype=Counts.dtype)),
+                            changed)
+
+    def iter_steps(self, num_steps, track_changes=False):
+        """
+        Runs simulation for specified number of time steps, yielding a snapshot of the metrics after each step. On the
+        first call, a snapshot of the initial state is yielded first, even if num_steps is 0. See ABM.iter_steps.
+
+        :param num_steps: Number of time steps to run the model
+        :param track_changes: If True, each snapshot holds an array of the indexes of the Agents whose status changed
+        during the step, including Agents which died.
+        :return: Generator of StepSnapshot.
+        """
+        if not self.baseline_counted:
+            self.baseline_counted = True
+            yield self.get_snapshot(np.zeros(0, dtype=np.int64) if track_changes else None)
+
+        for t in range(num_steps):
+            if track_changes:
+                status_before = self.status.copy()
+                alive_before = self.alive.copy()
+
+            self.step()
+            self.current_step += 1
+
+            changed = None
+            if track_changes:
+                changed = np.flatnonzero((self.status != status_before) | (self.alive != alive_before))
+
+            yield self.get_snapshot(changed)
+
+    def is_extinct(self):
+        """
+        Determines whether the epidemic is over. See ABM.is_extinct.
+        :return: True if no living Agents are infected or quarantined, False otherwise.
+        """
+        return not (self.alive & ((self.status == self.I) | (self.status == self.Q))).any()
+
+    def run_simulation(self, num_steps, track_movement=False):
+        """
+        Runs simulation for specified number of time steps, recording a metric count after each step. If no steps have
+        been run yet, the initial metrics are recorded first. Once the epidemic is extinct, the remaining steps are
+        not run, unless track_movement is True; see ABM.run_simulation.
+
+        :param num_steps: Number of time steps to run the model
+        :param track_movement: If True, every step is run even after the epidemic is extinct, so Agents keep moving.
+        :return: Counts of the baseline metrics taken at each time step in the model.
+        """
+        self.counts.reserve(len(self.counts) + num_steps + 1)
+        final_step = self.current_step + num_steps
+
+        steps = self.iter_steps(num_steps)
+        if self.baseline_counted and not track_movement and self.is_extinct():
+            steps = ()
+
+        for snapshot in steps:
+            self.add_counts()
+
+            if not track_movement and self.is_extinct():
+                break
+
+        # fast-forward through the steps which would change nothing
+        if self.current_step < final_step:
+            for t in range(final_step - self.current_step):
+                self.add_counts()
+            self.current_step = final_step
+
+        return self.counts
@@ -0,0 +1,83 @@
+"""
+Compares the cost of ABM.get_adj_agents using the occupancy grid against a full scan of the list of Agents.
+
+Run from the repository root:
+
+    python -m packages.benchmarks.bench_adj_agents
+"""
+import math
+import random
+import time
+
+from packages.abm.abm import ABM
+from packages.abm.agent_mover import AgentMover
+
+density = 0.4  # same agent density as the 250 agent, 25 x 25 world used in the notebook
+
+
+def scan_adj_agents(abm, agent):
+    """
+    Finds Agents within 1 position of this Agent by testing every Agent in the model, as ABM.get_adj_agents did before
+    the occupancy grid was introduced.
+    :param abm: ABM under consideration
+    :param agent: Agent under consideration
+    :return: List of Agents within 1 position of this Agent
+    """
+    nearby = []
+
+    am = AgentMover(abm.n)
+    positions = am.get_adj_positions(agent.position)
+
+    for each in abm.agents:
+        if each.position in positions:
+            nearby.append(each)
+
+    return nearby
+
+
+def time_queries(find, abm, sample):
+    """
+    Times neighbor queries for each Agent in sample.
+    :param find: function(abm, agent) which returns the Agents adjacent to agent
+    :param abm: ABM under consideration
+    :param sample: List of Agents to query
+    :return: Average seconds per query
+    """
+    start = time.perf_counter()
+    for agent in sample:
+        find(abm, agent)
+    return (time.perf_counter() - start) / len(sample)
+
+
+def run(m_values=(250, 10000, 100000), num_queries=200):
+    """
+    Builds a model for each number of Agents and reports the per-query and per-step cost of both neighbor lookups.
+    Per-step cost is estimated as m queries.
+    :param m_values: Numbers of Agents to benchmark
+    :param num_queries: Number of Agents sampled for timing
+    :return: List of result dictionaries, one per number of Agents
+    """
+    results = []
+
+    for m in m_values:
+        n = int(math.ceil(math.sqrt(m / density)))
+        abm = ABM(n, m, 10, 0.0, 0.0)
+        sample = random.sample(abm.agents, min(num_queries, m))
+
+        grid_time = time_queries(ABM.get_adj_agents, abm, sample)
+        scan_time = time_queries(scan_adj_agents, abm, sample)
+
+        results.append({'m': m, 'n': n,
+                        'grid_query_s': grid_time, 'scan_query_s': scan_time,
+                        'grid_step_s': grid_time * m, 'scan_step_s': scan_time * m})
+
+    return results
+
+
+if __name__ == '__main__':
+    print('{:>8} {:>6} {:>14} {:>14} {:>14} {:>14}'.format('m', 'n', 'grid/query', 'scan/query', 'grid/step',
+                                                         'scan/step'))
+    for r in run():
+        print('{:>8} {:>6} {:>13.2e}s {:>13.2e}s {:>13.3f}s {:>13.3f}s'.format(r['m'], r['n'], r['grid_query_s'],
+                                                                              r['scan_query_s'], r['grid_step_s'],
+                                                                              r['scan_step_s']))
@@ -0,0 +1,74 @@
+"""
+Measures memory per Agent with tracemalloc, comparing the slotted Agent against the previous layout in which each
+Agent kept its fields in a per-instance __dict__.
+
+Run from the repository root:
+
+    python -m packages.benchmarks.bench_agent_memory
+"""
+import time
+import tracemalloc
+
+from packages.abm.agent import Agent
+
+
+class DictAgent:
+    """
+    Agent field layout before __slots__ was introduced: every field is stored in the instance __dict__.
+    """
+
+    def __init__(self, position, status, mask, distancing):
+        self.position = position
+        self.status = status
+        self.asymptomatic = False
+        self.mask = mask
+        self.distancing = distancing
+        self.days_infected = 0  # instance attribute once written during a simulation
+
+
+def measure_bytes_per_agent(agent_class, num_agents):
+    """
+    Creates num_agents Agents and measures memory allocated while they are alive.
+    :param agent_class: Agent or DictAgent
+    :param num_agents: Number of Agents to create
+    :return: Average bytes per Agent, excluding the shared position tuples.
+    """
+    positions = [(i % 1000, i // 1000) for i in range(num_agents)]  # allocated before measuring
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    agents = [agent_class(positions[i], 'S', False, False) for i in range(num_agents)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return (after - before) / len(agents)
+
+
+def measure_access_time(agent_class, num_agents, repeats=10):
+    """
+    Times the attribute reads and writes made by Agent.update_agent for a susceptible Agent.
+    :param agent_class: Agent or DictAgent
+    :param num_agents: Number of Agents to update
+    :param repeats: Number of passes over the Agents
+    :return: Average seconds per Agent update.
+    """
+    agents = [agent_class((0, 0), 'S', False, False) for i in range(num_agents)]
+
+    start = time.perf_counter()
+    for r in range(repeats):
+        for agent in agents:
+            status = agent.status
+            if status == 'I' or status == 'Q':
+                agent.days_infected += 1
+            if agent.status == 'S' and agent.mask:
+                agent.asymptomatic = False
+    return (time.perf_counter() - start) / (num_agents * repeats)
+
+
+if __name__ == '__main__':
+    num_agents = 100000
+
+    for agent_class in [DictAgent, Agent]:
+        size = measure_bytes_per_agent(agent_class, num_agents)
+        access = measure_access_time(agent_class, num_agents)
+        print('{:>10}: {:6.1f} bytes/agent, {:6.1f} ns/update'.format(agent_class.__name__, size, access * 1e9))
@@ -0,0 +1,232 @@
+"""
+Times the main costs of a simulation over a grid of world sizes, Agent densities and intervention mixes, saves the
+results as JSON and compares them against a stored baseline.
+
+For each configuration the suite measures:
+ - init_s:       ABM.__init__, i.e. generating Agents and position_agents
+ - step_s:       run_simulation, per time step, with every step run (track_movement) and the progression pinned
+ - move_s:       AgentMover.move_all_agents, per call
+ - adj_agents_s: ABM.get_adj_agents, per call
+
+Run from the repository root:
+
+    python -m packages.benchmarks.bench_suite --output bench.json
+    python -m packages.benchmarks.bench_suite --baseline bench.json --output bench_new.json
+
+The first command records a baseline; the second times the current code and reports every measurement which is slower
+than the baseline by more than the threshold.
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from packages.abm.abm import ABM
+from packages.abm.agent_mover import AgentMover
+
+metrics = ['init_s', 'step_s', 'move_s', 'adj_agents_s']
+parameters = ['n', 'm', 'percent_distancing', 'percent_mask']
+
+
+def get_configurations(n_values, densities, distancing_values, mask_values):
+    """
+    Builds every combination of the given parameter values.
+    :param n_values: World dimensions
+    :param densities: Fractions of positions occupied by Agents
+    :param distancing_values: Values of percent_distancing
+    :param mask_values: Values of percent_mask
+    :return: List of dictionaries of model parameters.
+    """
+    configurations = []
+
+    for n, density, percent_distancing, percent_mask in itertools.product(n_values, densities, distancing_values,
+                                                                          mask_values):
+        configurations.append({'n': n, 'm': int(round(density * n * n)), 'percent_distancing': percent_distancing,
+                               'percent_mask': percent_mask})
+
+    return configurations
+
+
+def best_time(function, repeat):
+    """
+    Calls function repeatedly and returns the fastest time, which is the least affected by other activity on the
+    machine.
+    :param function: function() to time
+    :param repeat: Number of calls
+    :return: Seconds taken by the fastest call.
+    """
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def benchmark_configuration(configuration, num_infected=10, num_steps=10, repeat=3, seed=0, progression='sweep'):
+    """
+    Times the main costs of a simulation for one configuration.
+    :param configuration: Dictionary of model parameters from get_configurations()
+    :param num_infected: Number of Agents infected at the start
+    :param num_steps: Number of time steps timed by step_s
+    :param repeat: Number of times each measurement is repeated; the fastest is kept
+    :param seed: Seed for every model, so each run simulates the same scenario
+    :param progression: Value of ABM progression for every model, so step_s stays comparable with a baseline recorded
+    under a different default
+    :return: Dictionary of the configuration and its measurements.
+    """
+    args = (configuration['n'], configuration['m'], num_infected, configuration['percent_distancing'],
+            configuration['percent_mask'])
+
+    def build():
+        return ABM(*args, seed=seed, progression=progression)
+
+    init_time = best_time(build, repeat)
+
+    # track_movement runs every step, instead of skipping the steps after the infection dies out
+    step_time = best_time(lambda: build().run_simulation(num_steps, track_movement=True), repeat)
+    step_time = max(0.0, step_time - init_time) / num_steps
+
+    abm = build()
+    am = AgentMover(abm.n, abm.grid, abm.rngs['movement'])
+    move_time = best_time(lambda: am.move_all_agents(abm.agents), repeat)
+
+    agents = abm.agents
+    adj_time = best_time(lambda: [abm.get_adj_agents(agent) for agent in agents], repeat) / len(agents)
+
+    result = dict(configuration)
+    result.update({'init_s': init_time, 'step_s': step_time, 'move_s': move_time, 'adj_agents_s': adj_time})
+    return result
+
+
+def run(n_values=(25, 100), densities=(0.1, 0.4), distancing_values=(0.0, 0.2), mask_values=(0.0, 0.5), num_steps=10,
+        repeat=3, progression='sweep'):
+    """
+    Benchmarks every configuration in the grid of parameter values.
+    :param n_values: World dimensions
+    :param densities: Fractions of positions occupied by Agents
+    :param distancing_values: Values of percent_distancing
+    :param mask_values: Values of percent_mask
+    :param num_steps: Number of time steps timed by step_s
+    :param repeat: Number of times each measurement is repeated
+    :param progression: Value of ABM progression for every model
+    :return: Dictionary with 'environment' describing the machine and 'results', a list of result dictionaries.
+    """
+    results = []
+    for configuration in get_configurations(n_values, densities, distancing_values, mask_values):
+        results.append(benchmark_configuration(configuration, num_steps=num_steps, repeat=repeat,
+                                               progression=progression))
+
+    environment = {'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+                   'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'progression': progression}
+
+    return {'environment': environment, 'results': results}
+
+
+def save_results(results, path):
+    """
+    Writes results from run() to a JSON file.
+    :param results: Dictionary returned by run()
+    :param path: File to write
+    :return: None
+    """
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(path):
+    """
+    Reads results written by save_results().
+    :param path: File to read
+    :return: Dictionary in the format returned by run().
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(results, baseline, threshold=1.2):
+    """
+    Compares each measurement against the measurement for the same configuration in the baseline. Configurations
+    which are not in the baseline are skipped.
+    :param results: Dictionary returned by run()
+    :param baseline: Dictionary returned by run() or load_results()
+    :param threshold: Ratio of current to baseline time above which a measurement is reported as a regression
+    :return: List of dictionaries, one for each measurement, containing the configuration, metric, both times, their
+    ratio and whether it is a regression.
+    """
+    baseline_results = {tuple(each[key] for key in parameters): each for each in baseline['results']}
+
+    comparisons = []
+    for each in results['results']:
+        key = tuple(each[parameter] for parameter in parameters)
+        if key not in baseline_results:
+            continue
+
+        for metric in metrics:
+            before = baseline_results[key][metric]
+            after = each[metric]
+            ratio = after / before if before > 0 else float('inf')
+
+            comparison = {parameter: each[parameter] for parameter in parameters}
+            comparison.update({'metric': metric, 'baseline': before, 'current': after, 'ratio': ratio,
+                               'regression': ratio > threshold})
+            comparisons.append(comparison)
+
+    return comparisons
+
+
+def main(argv=None):
+    """
+    Runs the benchmark suite from the command line.
+    :param argv: List of command line arguments; defaults to sys.argv
+    :return: 1 if any regression was found, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the agent-based model.')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare results against this JSON file')
+    parser.add_argument('--threshold', type=float, default=1.2, help='slowdown ratio reported as a regression')
+    parser.add_argument('--n', type=int, nargs='+', default=[25, 100], help='world dimensions')
+    parser.add_argument('--density', type=float, nargs='+', default=[0.1, 0.4], help='fractions of positions occupied')
+    parser.add_argument('--distancing', type=float, nargs='+', default=[0.0, 0.2], help='percent_distancing values')
+    parser.add_argument('--mask', type=float, nargs='+', default=[0.0, 0.5], help='percent_mask values')
+    parser.add_argument('--steps', type=int, default=10, help='time steps timed per configuration')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions of each measurement')
+    parser.add_argument('--progression', choices=ABM.progression_modes, default='sweep',
+                        help='disease progression of every model')
+    args = parser.parse_args(argv)
+
+    results = run(args.n, args.density, args.distancing, args.mask, args.steps, args.repeat, args.progression)
+
+    print('{:>6} {:>7} {:>6} {:>6} {:>10} {:>10} {:>10} {:>12}'.format('n', 'm', 'dist', 'mask', 'init', 'step',
+                                                                      'move', 'adj_agents'))
+    for r in results['results']:
+        print('{:>6} {:>7} {:>6} {:>6} {:>9.4f}s {:>9.4f}s {:>9.4f}s {:>11.2e}s'.format(
+            r['n'], r['m'], r['percent_distancing'], r['percent_mask'], r['init_s'], r['step_s'], r['move_s'],
+            r['adj_agents_s']))
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        comparisons = compare_results(results, load_results(args.baseline), args.threshold)
+        regressions = [each for each in comparisons if each['regression']]
+
+        print()
+        print(str(len(comparisons)) + ' measurements compared, ' + str(len(regressions)) + ' regressions')
+        for each in regressions:
+            print('  n={} m={} dist={} mask={} {}: {:.4g}s -> {:.4g}s ({:.2f}x)'.format(
+                each['n'], each['m'], each['percent_distancing'], each['percent_mask'], each['metric'],
+                each['baseline'], each['current'], each['ratio']))
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,14 @@
+import copy
+import pickle
+import random
+
+import numpy as np
+
 from packages.abm.abm import ABM
 from packages.abm.agent import Agent
+from packages.abm.agent_mover import AgentMover
+from packages.abm.profiler import Profiler
+from packages.abm.progression_schedule import ProgressionSchedule
 
 
 def test__init__():
@@ -71,6 +80,77 @@ def test_remove_agent():
     assert a not in abm.agents
     assert len(abm.agents) == m - 1, len(abm.agents)
     assert abm.num_dead == 1
+    assert abm.grid.get_agent(a.position) is None
+
+    # removing twice has no effect
+    abm.remove_agent(a)
+    assert abm.num_dead == 1
+
+    # dead agent no longer counted under its status
+    abm = ABM(n, m, num_infected, percent_distancing, percent_mask, percent_vaccinated)
+    abm.count_baseline_metrics()
+    infected = [agent for agent in abm.agents if agent.status == 'I']
+    abm.remove_agent(infected[0])
+    assert abm.num_infected == num_infected - 1
+    assert abm.num_dead == 1
+
+    # scheduled events of an agent removed mid-run are ignored
+    abm = ABM(n, m, num_infected, 0.1, percent_mask, percent_vaccinated, seed=1)
+    abm.run_simulation(1)
+    infected = [agent for agent in abm.agents if agent.status == 'I' and not agent.asymptomatic]
+    abm.remove_agent(infected[0])
+    assert abm.get_days_infected(infected[0]) == 0
+    abm.run_simulation(20)
+
+    assert infected[0].status == 'I'
+    living = [agent.status for agent in abm.agents]
+    row = abm.counts[-1]
+    for status in ['R', 'I', 'S', 'Q']:
+        assert row[status] == living.count(status), status
+    assert row['D'] == m - len(living)
+
+
+def test_run_simulation_high_mortality(monkeypatch):
+    n = 25
+    m = 250
+    abm = ABM(n, m, 100, 0.1, 0.35, 0.0, seed=3, progression='sweep')
+
+    # every infected agent has a 30% chance of dying each step
+    def has_died(agent):
+        infected = agent.status == 'I' or agent.status == 'Q'
+        return infected and agent.rng.random() < 0.3
+
+    updates = {}
+    checked_steps = []
+    update_agent = Agent.update_agent
+    move_all_agents = AgentMover.move_all_agents
+
+    def counting_update_agent(agent, adjacent_agents):
+        updates[id(agent)] = updates.get(id(agent), 0) + 1
+        update_agent(agent, adjacent_agents)
+
+    def checking_move_all_agents(am, agents):
+        # every surviving agent was updated exactly once this step, dead agents were not updated
+        for agent in agents:
+            assert updates[id(agent)] == 1
+        assert len(updates) == len(agents)
+
+        checked_steps.append(len(agents))
+        updates.clear()
+        move_all_agents(am, agents)
+
+    monkeypatch.setattr(Agent, 'has_died', has_died)
+    monkeypatch.setattr(Agent, 'update_agent', counting_update_agent)
+    monkeypatch.setattr(AgentMover, 'move_all_agents', checking_move_all_agents)
+
+    abm.run_simulation(10)
+    assert len(checked_steps) == 10
+    assert checked_steps[-1] < m
+
+    # every agent is counted under exactly one status
+    assert abm.num_dead > 0
+    for row in abm.counts:
+        assert sum(row.values()) == m
 
 
 def test_add_counts():
@@ -123,6 +203,35 @@ def test_get_adj_agents():
     assert len(adj) == 1
     assert a2 in adj
 
+    # wrapped around torus
+    a4 = Agent((24, 24), 'I', mask=True, distancing=False)
+    abm.agents = [a1, a2, a3, a4]
+    adj = abm.get_adj_agents(a2)
+
+    assert len(adj) == 2
+    assert a1 in adj and a4 in adj
+
+
+def test_grid_tracks_agents():
+    n = 25
+    m = 250
+    num_infected = 10
+    percent_distancing = 0.25
+    percent_mask = 0.35
+    percent_vaccinated = 0.1
+    abm = ABM(n, m, num_infected, percent_distancing, percent_mask, percent_vaccinated)
+
+    # grid matches positions after placement
+    for agent in abm.agents:
+        assert abm.grid.get_agent(agent.position) is agent
+
+    # grid matches positions after movement
+    abm.run_simulation(5)
+    occupied = sum(1 for row in abm.grid.cells for cell in row if cell is not None)
+    assert occupied == len(abm.agents)
+    for agent in abm.agents:
+        assert abm.grid.get_agent(agent.position) is agent
+
 
 def test_update_baseline_metrics():
     n = 25
@@ -176,6 +285,324 @@ def test_run_simulation():
     counts = abm.run_simulation(365)
 
     assert len(counts) == 366  # one additional for initialization
+    assert counts.array.shape == (366, 5)
+    assert len(counts.buffer) == 366  # preallocated, no growth
+
+
+def test_iter_steps():
+    n = 25
+    m = 250
+    abm = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=4)
+    snapshots = list(abm.iter_steps(20, track_changes=True))
+
+    # initial state followed by one snapshot per step
+    assert [snapshot.step for snapshot in snapshots] == list(range(21))
+    assert len(abm.counts) == 0
+    assert snapshots[0].counts['I'] == 10
+    for snapshot in snapshots:
+        assert sum(snapshot.counts.values()) == m
+
+    # changes account for the difference in counts between steps
+    for previous, snapshot in zip(snapshots, snapshots[1:]):
+        difference = {status: snapshot.counts[status] - previous.counts[status] for status in ABM.count_statuses}
+        for agent, before, after in snapshot.changed:
+            difference[before] += 1
+            difference[after] -= 1
+        assert all(value == 0 for value in difference.values())
+
+    # same results as run_simulation
+    counts = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=4).run_simulation(20)
+    assert [dict(row) for row in counts] == [dict(snapshot.counts) for snapshot in snapshots]
+
+    # stopping early and continuing gives the same results
+    abm = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=4)
+    for snapshot in abm.iter_steps(20):
+        if snapshot.step == 8:
+            break
+    continued = list(abm.iter_steps(12))
+    assert continued[0].step == 9
+    assert [dict(snapshot.counts) for snapshot in continued] == [dict(row) for row in counts][9:]
+
+    # the initial state is only recorded once, even if no steps are run
+    abm = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=4)
+    assert len(abm.run_simulation(0)) == 1
+    assert len(abm.run_simulation(5)) == 6
+    assert [dict(row) for row in abm.counts] == [dict(row) for row in counts][:6]
+
+
+def test_checkpoint(tmp_path):
+    n = 25
+    m = 250
+    path = tmp_path / 'checkpoint.npz'
+
+    # uninterrupted run
+    abm = ABM(n, m, 10, 0.2, 0.35, 0.1, seed=8)
+    expected = abm.run_simulation(30).array.copy()
+    expected_positions = [agent.position for agent in abm.agents]
+
+    # interrupted run, resumed from the last checkpoint
+    abm = ABM(n, m, 10, 0.2, 0.35, 0.1, seed=8)
+    abm.run_simulation(14, checkpoint_every=4, checkpoint_path=path)
+
+    resumed = ABM.load_checkpoint(path)
+    assert resumed.current_step == 12
+    assert len(resumed.counts) == 13
+
+    counts = resumed.run_simulation(30 - resumed.current_step)
+    assert np.array_equal(counts.array, expected)
+    assert [agent.position for agent in resumed.agents] == expected_positions
+
+    # missing path
+    try:
+        abm.run_simulation(1, checkpoint_every=1)
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_checkpoint_extinct(tmp_path):
+    path = tmp_path / 'checkpoint.npz'
+
+    for seed, movement, progression in [(9, 'sequential', 'sweep'), (0, 'checkerboard', 'scheduled')]:
+        # uninterrupted run, extinct before the last checkpoint
+        abm = ABM(25, 250, 10, 0.2, 0.35, 0.1, seed=seed, movement=movement, progression=progression)
+        expected = abm.run_simulation(60).array.copy()
+        expected_positions = [agent.position for agent in abm.agents]
+        assert expected[23, 2] + expected[23, 4] == 0
+
+        abm = ABM(25, 250, 10, 0.2, 0.35, 0.1, seed=seed, movement=movement, progression=progression)
+        abm.run_simulation(23, checkpoint_every=7, checkpoint_path=path)
+
+        # resumed model does not move agents again
+        resumed = ABM.load_checkpoint(path)
+        assert resumed.current_step == 23
+        counts = resumed.run_simulation(60 - resumed.current_step)
+        assert np.array_equal(counts.array, expected)
+        assert [agent.position for agent in resumed.agents] == expected_positions
+
+
+def test_run_simulation_profiler():
+    n = 25
+    m = 400
+    profiler = Profiler()
+    abm = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=2, profiler=profiler, progression='sweep')
+    counts = abm.run_simulation(10)
+
+    # same results as a run without a profiler
+    expected = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=2, progression='sweep').run_simulation(10)
+    assert np.array_equal(counts.array, expected.array)
+
+    report = profiler.report()
+    assert report['steps'] == 10
+    for phase in ['generation', 'placement', 'death_check', 'neighbor_query', 'update_agent', 'metrics', 'compaction',
+                  'movement']:
+        assert report['phases'][phase]['seconds'] >= 0
+    assert abs(sum(phase['fraction'] for phase in report['phases'].values()) - 1) < 1e-9
+
+    counters = report['counters']
+    assert counters['placement_attempts'] >= 1
+    assert counters['neighbor_checks'] == 8 * counters['neighbor_queries']
+    assert counters['no_legal_move'] > 0  # crowded grid
+
+    # scheduled progression
+    profiler = Profiler()
+    counts = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=2, profiler=profiler).run_simulation(10)
+    expected = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=2).run_simulation(10)
+    assert np.array_equal(counts.array, expected.array)
+
+    report = profiler.report()
+    for phase in ['frontier', 'neighbor_query', 'infection', 'events', 'metrics', 'compaction', 'movement']:
+        assert report['phases'][phase]['seconds'] >= 0
+    counters = report['counters']
+    assert counters['neighbor_queries'] > 0
+    assert counters['neighbor_checks'] == 8 * counters['neighbor_queries']
+
+    # same status changes as a run without a profiler
+    for progression in ABM.progression_modes:
+        changes = []
+        for profiler in [None, Profiler()]:
+            abm = ABM(n, m, 10, 0.1, 0.35, 0.1, seed=2, profiler=profiler, progression=progression)
+            index = {agent: i for i, agent in enumerate(abm.agents)}
+            changes.append([[(index[agent], before, after) for agent, before, after in snapshot.changed]
+                            for snapshot in abm.iter_steps(10, track_changes=True)])
+        assert changes[0] == changes[1]
+        assert sum(len(changed) for changed in changes[0]) > 0
+
+
+def test_run_simulation_checkerboard():
+    n = 25
+    m = 250
+    abm = ABM(n, m, 10, 0.2, 0.35, 0.1, seed=3, movement='checkerboard')
+    counts = abm.run_simulation(20)
+
+    assert len(counts) == 21
+    for count_dict in counts:
+        assert sum(count_dict.values()) == m
+
+    am = AgentMover(n)
+    assert len(am.check_position_conflicts(abm.agents)) == 0
+    assert len(am.check_distancing_conflicts(abm.agents)) == 0
+    for agent in abm.agents:
+        assert abm.grid.get_agent(agent.position) is agent
+
+    # invalid mode
+    try:
+        ABM(n, m, 10, 0.2, 0.35, 0.1, movement='diagonal')
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_run_simulation_extinct(monkeypatch):
+    n = 10
+    m = 30
+    abm = ABM(n, m, 1, 0.1, 0.3, seed=0)
+    moved = []
+    move_all_agents = AgentMover.move_all_agents
+
+    def counting_move_all_agents(am, agents):
+        moved.append(abm.current_step)
+        move_all_agents(am, agents)
+
+    monkeypatch.setattr(AgentMover, 'move_all_agents', counting_move_all_agents)
+    counts = abm.run_simulation(60)
+
+    # steps after extinction are not run, but are recorded
+    assert len(counts) == 61
+    assert abm.current_step == 60
+    assert len(moved) < 60
+    assert abm.is_extinct()
+    assert np.array_equal(counts.array[len(moved):], np.repeat(counts.array[-1:], 61 - len(moved), axis=0))
+
+    # same counts when every step is run
+    moved.clear()
+    other = ABM(n, m, 1, 0.1, 0.3, seed=0)
+    assert np.array_equal(other.run_simulation(60, track_movement=True).array, counts.array)
+    assert len(moved) == 60
+
+
+def test_days_infected_scheduled():
+    n = 25
+    m = 250
+    expected = ABM(n, m, 10, 0.2, 0.35, 0.1, seed=5)
+    expected.run_simulation(12)
+
+    abm = ABM(n, m, 10, 0.2, 0.35, 0.1, seed=5)
+    abm.run_simulation(5)
+
+    # days_infected is up to date when agents is read
+    days = {agent: agent.days_infected for agent in abm.agents}
+    assert sorted(set(days.values())) == [0, 1, 2, 3, 4, 5]
+    for agent in abm.agents:
+        assert agent.days_infected == abm.get_days_infected(agent)
+        if agent.status == 'I' and agent.days_infected > 2:
+            assert agent.asymptomatic
+
+    # reassigning agents keeps the schedule
+    abm.agents = abm.agents
+    assert {agent: abm.get_days_infected(agent) for agent in abm.agents} == days
+    abm.run_simulation(7)
+    assert np.array_equal(abm.counts.array, expected.counts.array)
+
+
+def test_get_frontier():
+    abm = ABM(25, 10, 1, 0.0, 0.0, seed=0)
+
+    infected = Agent((1, 1), 'I', mask=False, distancing=False)
+    quarantined = Agent((5, 5), 'Q', mask=False, distancing=False)
+    s1 = Agent((0, 0), 'S', mask=False, distancing=False)
+    s2 = Agent((2, 1), 'S', mask=True, distancing=False)
+    s3 = Agent((5, 6), 'S', mask=False, distancing=False)
+    s4 = Agent((10, 10), 'S', mask=False, distancing=False)
+    recovered = Agent((1, 2), 'R', mask=False, distancing=False)
+    abm.agents = [infected, quarantined, s1, s2, s3, s4, recovered]
+    abm.schedule = ProgressionSchedule.from_agents(abm.agents, 0, abm.rngs['progression'])
+
+    # only susceptible agents next to an infected agent; quarantined agents are not infectious
+    assert abm.get_frontier() == {s1, s2}
+
+
+def test_run_simulation_scheduled(monkeypatch):
+    n = 25
+    m = 250
+
+    # without deaths, which are drawn differently, same results as updating every agent
+    monkeypatch.setattr(Agent, 'death_rate', 0)
+    for seed in range(3):
+        expected = ABM(n, m, 10, 0.2, 0.35, 0.1, seed=seed, progression='sweep')
+        expected.run_simulation(40, track_movement=True)
+        abm = ABM(n, m, 10, 0.2, 0.35, 0.1, seed=seed)
+        abm.run_simulation(40, track_movement=True)
+
+        assert np.array_equal(abm.counts.array, expected.counts.array)
+        assert [agent.position for agent in abm.agents] == [agent.position for agent in expected.agents]
+        assert [abm.get_days_infected(agent) for agent in abm.agents] == \
+            [agent.days_infected for agent in expected.agents]
+
+    # same distribution of deaths
+    monkeypatch.undo()
+    deaths = {}
+    for progression in ABM.progression_modes:
+        models = [ABM(n, m, 50, 0.2, 0.35, 0.1, seed=seed, progression=progression) for seed in range(40)]
+        deaths[progression] = [abm.run_simulation(30)[-1]['D'] for abm in models]
+    standard_error = np.sqrt((np.var(deaths['sweep']) + np.var(deaths['scheduled'])) / 40)
+    assert abs(np.mean(deaths['sweep']) - np.mean(deaths['scheduled'])) < 5 * standard_error
+
+    # invalid mode
+    try:
+        ABM(n, m, 10, 0.2, 0.35, 0.1, progression='daily')
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_seed():
+    n = 10
+    m = 40
+
+    # same seed gives identical results
+    counts_1 = ABM(n, m, 3, 0.1, 0.3, 0.1, seed=5).run_simulation(30)
+    counts_2 = ABM(n, m, 3, 0.1, 0.3, 0.1, seed=5).run_simulation(30)
+    assert np.array_equal(counts_1.array, counts_2.array)
+
+    # same SeedSequence gives identical results each time it is used
+    seed = np.random.SeedSequence(5)
+    abm_1 = ABM(n, m, 3, 0.1, 0.3, 0.1, seed=seed)
+    abm_2 = ABM(n, m, 3, 0.1, 0.3, 0.1, seed=seed)
+    assert [a.position for a in abm_1.agents] == [a.position for a in abm_2.agents]
+
+    # subsystems draw from separate streams
+    abm_1 = ABM(n, m, 3, 0.1, 0.3, 0.1, seed=5)
+    abm_2 = ABM(n, m, 3, 0.1, 0.3, 0.1, seed=5)
+    abm_1.rngs['movement'].random()  # only movement stream is advanced
+    assert abm_1.rngs['progression'].get_state() == abm_2.rngs['progression'].get_state()
+    assert abm_1.rngs['movement'].get_state() != abm_2.rngs['movement'].get_state()
+
+    # models stepped in turn keep drawing from their own streams
+    expected = [ABM(n, m, 3, 0.1, 0.3, 0.1, seed=seed).run_simulation(30).array for seed in [5, 6]]
+    models = [ABM(n, m, 3, 0.1, 0.3, 0.1, seed=seed) for seed in [5, 6]]
+    for t in range(30):
+        for abm in models:
+            abm.run_simulation(1)
+    assert np.array_equal(models[0].counts.array, expected[0])
+    assert np.array_equal(models[1].counts.array, expected[1])
+
+    # global random module is not used
+    state = random.getstate()
+    ABM(n, m, 3, 0.1, 0.3, 0.1, seed=6).run_simulation(10)
+    assert random.getstate() == state
+
+
+def test_copy():
+    abm = ABM(25, 250, 10, 0.1, 0.35, 0.1, seed=1)
+    abm.run_simulation(3)
+
+    # copies continue the same simulation
+    copied = copy.deepcopy(abm)
+    unpickled = pickle.loads(pickle.dumps(abm))
+    expected = abm.run_simulation(10).array
+    assert np.array_equal(copied.run_simulation(10).array, expected)
+    assert np.array_equal(unpickled.run_simulation(10).array, expected)
 
 
 def test_run_and_visualize_simulation():
@@ -1,4 +1,9 @@
+import copy
+import pickle
+import random
+
 from packages.abm.agent import Agent
+from packages.abm.rng import BlockRNG
 
 
 def test__init__():
@@ -21,6 +26,23 @@ def test__init__():
     assert round(counter / num, 2) == 0.20
 
 
+def test_slots():
+    a1 = Agent((1, 1), 'I', mask=True, distancing=True)
+    a2 = Agent((1, 2), 'I', mask=True, distancing=True)
+
+    # no per-instance dictionary
+    assert not hasattr(a1, '__dict__')
+    try:
+        a1.other = 1
+        assert False
+    except AttributeError:
+        assert True
+
+    # days_infected belongs to each instance
+    a1.days_infected = 5
+    assert a2.days_infected == 0
+
+
 def test_is_event():
     a1 = Agent((1, 1), 'I', mask=True, distancing=True)
 
@@ -355,3 +377,65 @@ def test_has_died():
         if a3.has_died():
             counter += 1
     assert round(counter / num, 1) == 0.0
+
+
+def test_has_died_death_rate(monkeypatch):
+    rng = BlockRNG(0)
+    monkeypatch.setattr(Agent, 'rng', rng)
+    a1 = Agent((0, 1), 'I', mask=False, distancing=True)
+
+    monkeypatch.setattr(Agent, 'death_rate', 1)
+    assert a1.has_died()
+
+    # no draw is made when death is impossible
+    monkeypatch.setattr(Agent, 'death_rate', 0)
+    state = rng.get_state()
+    assert not a1.has_died()
+    assert rng.get_state()['pending'] == state['pending']
+
+
+def test_copy():
+    a1 = Agent((0, 1), 'I', mask=True, distancing=False)
+    a1.days_infected = 3
+
+    for a2 in [copy.deepcopy(a1), pickle.loads(pickle.dumps(a1))]:
+        assert a2.position == a1.position
+        assert a2.status == a1.status
+        assert a2.mask and not a2.distancing
+        assert a2.asymptomatic == a1.asymptomatic
+        assert a2.days_infected == 3
+
+
+def test_infection_probability():
+    # single infected adjacent agent matches fixed rates
+    assert Agent.infection_probability(1, 0, 0) == 0.25
+    assert round(Agent.infection_probability(0, 1, 0), 10) == 0.01
+    assert round(Agent.infection_probability(0, 0, 1), 10) == 0.0001
+
+    # no infected adjacent agents
+    assert Agent.infection_probability(0, 0, 0) == 0
+
+    # independent chances combine
+    assert Agent.infection_probability(2, 0, 0) == 1 - 0.75 * 0.75
+    expected = 1 - 0.75 * 0.99 * 0.9999
+    assert abs(Agent.infection_probability(1, 1, 1) - expected) < 1e-12
+
+
+def test_is_infected_single_draw():
+    a1 = Agent((1, 1), 'S', mask=False, distancing=False)
+    adjacent = [Agent((0, 1), 'R', mask=False, distancing=False), Agent((1, 2), 'S', mask=False, distancing=False)]
+
+    # no draw when no adjacent agent is infected
+    state = random.getstate()
+    assert a1.is_infected(adjacent) is False
+    assert random.getstate() == state
+
+    # one draw regardless of number of infected adjacent agents
+    adjacent = [Agent((0, 1), 'I', mask=False, distancing=False) for i in range(8)]
+    state = random.getstate()
+    a1.is_infected(adjacent)
+    after = random.getstate()
+
+    random.setstate(state)
+    random.random()
+    assert random.getstate() == after
@@ -1,3 +1,4 @@
+from packages.abm.agent import Agent
 from packages.abm.agent_generator import AgentGenerator
 
 def test__init__percent_vaccinated():
@@ -94,6 +95,10 @@ def test_select_indexes():
             counter += 1
     assert counter == 0
 
+    # every position can be selected
+    positions = ag.select_indexes(m)
+    assert sorted(positions) == list(range(m))
+
 def test_create_agents():
     m = 100
     ag = AgentGenerator(m, 10, 0.25, 0.35, 0.45)
@@ -127,3 +132,19 @@ def test_create_agents():
     assert vaccinated_counter == 45, vaccinated_counter
     assert susceptible_counter == m - infected_counter - vaccinated_counter, susceptible_counter
 
+
+
+def test_generate_arrays():
+    m = 100
+    ag = AgentGenerator(m, 10, 0.25, 0.35, 0.45)
+    properties = ag.generate_arrays()
+
+    status = [Agent.statuses[code] for code in properties['status']]
+    assert status.count('I') == 10
+    assert status.count('R') == 45
+    assert status.count('S') == m - 10 - 45
+    assert properties['mask'].sum() == 35
+    assert properties['distancing'].sum() == 25
+
+    # only infected agents can be asymptomatic
+    assert not properties['asymptomatic'][10:].any()
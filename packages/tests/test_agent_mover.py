@@ -2,6 +2,9 @@ import random
 from packages.abm.agent_generator import AgentGenerator
 from packages.abm.agent_mover import AgentMover
 from packages.abm.agent_generator import Agent
+from packages.abm.occupancy_grid import OccupancyGrid
+from packages.abm.profiler import Profiler
+from packages.abm.rng import BlockRNG
 
 
 def test_position_agents():
@@ -40,6 +43,13 @@ def test_position_agents():
     for each in agents:
         assert each.position != (-1, -1)
 
+    # fill the grid completely
+    n = 10
+    am = AgentMover(n)
+    agents = [Agent((-1, -1), 'I', mask=True, distancing=False) for i in range(n * n)]
+    assert am.position_agents(agents)
+    assert len({each.position for each in agents}) == n * n
+
     # try with 10% distancing
     n = 25
     am = AgentMover(n)
@@ -61,6 +71,61 @@ def test_position_agents():
         assert each.position != (-1, -1)
 
 
+def test_position_agents_high_distancing():
+    # every agent distancing, at the largest possible density
+    n = 20
+    profiler = Profiler()
+    am = AgentMover(n, profiler=profiler)
+    agents = [Agent((-1, -1), 'S', mask=False, distancing=True) for i in range(100)]
+    assert am.position_agents(agents)
+    assert len(am.check_position_conflicts(agents)) == 0
+    assert len(am.check_distancing_conflicts(agents)) == 0
+    assert profiler.counters['lattice_placements'] == 1
+
+    # mostly distancing, with room left for the others
+    agents = [Agent((-1, -1), 'S', mask=False, distancing=i < 80) for i in range(120)]
+    assert am.position_agents(agents)
+    assert len(am.check_position_conflicts(agents)) == 0
+    assert len(am.check_distancing_conflicts(agents)) == 0
+
+    # more distancing agents than can fit
+    agents = [Agent((-1, -1), 'S', mask=False, distancing=True) for i in range(101)]
+    try:
+        am.position_agents(agents)
+        assert False
+    except ValueError as e:
+        assert 'at most 100' in str(e)
+
+    # odd n: more distancing agents can fit than the lattice holds
+    am = AgentMover(5)
+    assert am.get_distancing_capacity() == 4
+    assert am.get_distancing_limit() == 5
+    assert AgentMover(25).get_distancing_limit() == 150
+
+    # random positioning finds a layout for more agents than the lattice holds
+    am = AgentMover(5, rng=BlockRNG(0))
+    agents = [Agent((-1, -1), 'S', mask=False, distancing=True) for i in range(5)]
+    assert am.position_agents(agents)
+    assert len(am.check_position_conflicts(agents)) == 0
+    assert len(am.check_distancing_conflicts(agents)) == 0
+
+    # random positioning fails, and the lattice cannot be used instead
+    am = AgentMover(5, rng=BlockRNG(1))
+    agents = [Agent((-1, -1), 'S', mask=False, distancing=True) for i in range(5)]
+    try:
+        am.position_agents(agents)
+        assert False
+    except ValueError as e:
+        assert 'lattice holds at most 4' in str(e)
+
+    agents = [Agent((-1, -1), 'S', mask=False, distancing=True) for i in range(6)]
+    try:
+        am.position_agents(agents)
+        assert False
+    except ValueError as e:
+        assert 'at most 5' in str(e)
+
+
 def test_get_random_position():
     n = 25
     am = AgentMover(n)
@@ -217,6 +282,26 @@ def test_position_distancing_agents():
     assert result
 
 
+def test_position_distancing_agents_lattice():
+    for n in [2, 3, 10, 11, 25]:
+        am = AgentMover(n)
+        capacity = am.get_distancing_capacity()
+        agents = [Agent((-1, -1), 'I', mask=True, distancing=True) for i in range(capacity)]
+
+        result, unavailable = am.position_distancing_agents_lattice(agents)
+        assert result
+        assert len(am.check_position_conflicts(agents)) == 0
+        assert len(am.check_distancing_conflicts(agents)) == 0
+        for agent in agents:
+            assert agent.position in unavailable
+
+    # no room for one more agent
+    am = AgentMover(10)
+    agents = [Agent((-1, -1), 'I', mask=True, distancing=True) for i in range(26)]
+    result, unavailable = am.position_distancing_agents_lattice(agents)
+    assert result is False
+
+
 def test_position_remaining_agents():
     n = 1
     am = AgentMover(n)
@@ -409,6 +494,28 @@ def test_get_available_positions():
     assert len(available) == 0
 
 
+def test_get_available_positions_with_grid():
+    n = 12
+    ag = AgentGenerator(40, 5, 0.25, 0.35, 0.1)
+
+    # grid-backed availability matches scanning the list of agents
+    for i in range(20):
+        agents = ag.generate_agents()
+        AgentMover(n).position_agents(agents)
+        am_list = AgentMover(n)
+        am_grid = AgentMover(n, OccupancyGrid(n, agents))
+
+        for agent in agents:
+            expected = am_list.get_available_positions(agent, agents)
+            actual = am_grid.get_available_positions(agent, agents)
+            assert set(expected) == actual, str(agent)
+
+            expected = am_list.find_nearby_agents(agents, agent.position)
+            actual = am_grid.find_nearby_agents(None, agent.position)
+            assert len(expected) == len(actual)
+            assert set(map(id, expected)) == set(map(id, actual))
+
+
 def test_move_agent():
     n = 25
     am = AgentMover(n)
@@ -436,6 +543,18 @@ def test_move_agent():
     assert round(counter / num, 2) == 0.33, 'rate ' + str(round(counter / num, 2)) + ' is not 0.33'
 
 
+def test_move_agent_with_grid():
+    n = 25
+    a1 = Agent((5, 5), 'I', mask=True, distancing=False)
+    grid = OccupancyGrid(n, [a1])
+    am = AgentMover(n, grid)
+
+    am.move_agent(a1, [(5, 6)])
+    assert a1.position == (5, 6)
+    assert grid.get_agent((5, 5)) is None
+    assert grid.get_agent((5, 6)) is a1
+
+
 def test_check_position_conflicts():
     n = 25
     am = AgentMover(n)
@@ -522,3 +641,76 @@ def test_move_all_agents():
         # check that no agents breach distancing
         conflicts_dist = am.check_distancing_conflicts(agents)
         assert len(conflicts_dist) == 0
+
+    # many agents with a grid kept up to date across moves
+    ag = AgentGenerator(100, 5, 0.1, 0.35, 0.1)
+    agents = ag.generate_agents()
+    am.position_agents(agents)
+    grid = OccupancyGrid(n, agents)
+    am_grid = AgentMover(n, grid)
+    for i in range(50):
+        am_grid.move_all_agents(agents)
+        assert len(am.check_position_conflicts(agents)) == 0
+        assert len(am.check_distancing_conflicts(agents)) == 0
+        for agent in agents:
+            assert grid.get_agent(agent.position) is agent
+
+
+def test_get_axis_colors():
+    for n in range(1, 30):
+        colors = AgentMover(n).get_axis_colors()
+        assert len(colors) == n
+
+        # coordinates of the same color are at least sweep_separation apart around the torus
+        for i in range(n):
+            for j in range(i + 1, n):
+                if colors[i] == colors[j]:
+                    assert min(j - i, n - (j - i)) >= AgentMover.sweep_separation
+
+    assert AgentMover(8).get_axis_colors() == [0, 1, 2, 3, 0, 1, 2, 3]
+    assert AgentMover(10).get_axis_colors() == [0, 1, 2, 3, 0, 1, 2, 3, 4, 5]
+
+
+def test_move_all_agents_checkerboard():
+    n = 25
+    am = AgentMover(n)
+
+    ag = AgentGenerator(150, 5, 0.2, 0.35, 0.1)
+    agents = ag.generate_agents()
+    am.position_agents(agents)
+
+    # every agent belongs to exactly one class
+    classes = am.get_color_classes(agents)
+    assert sum(len(color_class) for color_class in classes) == len(agents)
+
+    grid = OccupancyGrid(n, agents)
+    am_grid = AgentMover(n, grid)
+    for i in range(50):
+        am_grid.move_all_agents_checkerboard(agents)
+        assert len(am.check_position_conflicts(agents)) == 0
+        assert len(am.check_distancing_conflicts(agents)) == 0
+        for agent in agents:
+            assert grid.get_agent(agent.position) is agent
+
+    # without a grid
+    before = [agent.position for agent in agents]
+    am.move_all_agents_checkerboard(agents)
+    assert [agent.position for agent in agents] != before
+    assert len(am.check_position_conflicts(agents)) == 0
+    assert len(am.check_distancing_conflicts(agents)) == 0
+
+
+def test_get_positions():
+    n = 25
+    am = AgentMover(n)
+    distancing = [i < 50 for i in range(250)]
+    positions = am.get_positions(distancing)
+
+    assert len(positions) == 250
+    assert len(set(positions)) == 250
+
+    # no agent is adjacent to a distancing agent
+    occupied = set(positions)
+    for position, each in zip(positions, distancing):
+        if each:
+            assert len(am.get_adj_positions(position) & occupied) == 0
@@ -0,0 +1,79 @@
+import numpy as np
+
+from packages.abm.counts import Counts
+
+
+def test__init__():
+    counts = Counts(10)
+    assert len(counts) == 0
+    assert counts.buffer.shape == (10, 5)
+
+    # existing buffer
+    buffer = np.zeros((3, 5), dtype=np.int32)
+    counts = Counts(buffer=buffer)
+    counts.append([1, 2, 3, 4, 5])
+    assert list(buffer[0]) == [1, 2, 3, 4, 5]
+
+    # wrong shape
+    try:
+        Counts(buffer=np.zeros((3, 4)))
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_append():
+    counts = Counts()
+
+    # grows when full
+    for i in range(10):
+        counts.append([i, 0, 0, 0, 0])
+    assert len(counts) == 10
+    assert len(counts.buffer) >= 10
+    assert list(counts.array[:, 0]) == list(range(10))
+
+
+def test_reserve():
+    counts = Counts()
+    counts.append([1, 2, 3, 4, 5])
+    counts.reserve(100)
+
+    assert len(counts.buffer) == 100
+    assert len(counts) == 1
+    assert counts[0]['R'] == 1
+
+
+def test_array():
+    counts = Counts(5)
+    counts.append([1, 2, 3, 4, 5])
+    counts.append([6, 7, 8, 9, 10])
+
+    assert counts.array.shape == (2, 5)
+
+    # read-only
+    try:
+        counts.array[0, 0] = 100
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_rows():
+    counts = Counts()
+    counts.append([1, 2, 3, 4, 5])
+    counts.append([6, 7, 8, 9, 10])
+
+    row = counts[0]
+    assert row['R'] == 1 and row['D'] == 2 and row['I'] == 3 and row['S'] == 4 and row['Q'] == 5
+    assert list(row.keys()) == ['R', 'D', 'I', 'S', 'Q']
+    assert row == {'R': 1, 'D': 2, 'I': 3, 'S': 4, 'Q': 5}
+    assert counts[-1]['Q'] == 10
+
+    try:
+        counts[2]
+        assert False
+    except IndexError:
+        assert True
+
+    assert counts.to_dicts() == [{'R': 1, 'D': 2, 'I': 3, 'S': 4, 'Q': 5}, {'R': 6, 'D': 7, 'I': 8, 'S': 9, 'Q': 10}]
+    assert [row['S'] for row in counts] == [4, 9]
@@ -0,0 +1,72 @@
+import random
+
+from packages.abm.free_positions import FreePositions
+from packages.abm.rng import BlockRNG
+
+
+def test__init__():
+    free = FreePositions(5, [(0, 0), (4, 4)])
+    assert len(free) == 23
+    assert (0, 0) not in free
+    assert (4, 4) not in free
+    assert (2, 3) in free
+
+
+def test_discard():
+    free = FreePositions(3)
+    free.discard((1, 1))
+    assert len(free) == 8
+    assert (1, 1) not in free
+
+    # already taken
+    free.discard((1, 1))
+    assert len(free) == 8
+
+    # index stays consistent after swaps
+    for location, cell in enumerate(free.cells):
+        assert free.index[cell] == location
+
+
+def test_draw():
+    n = 4
+    free = FreePositions(n)
+    drawn = [free.draw(random) for i in range(n * n)]
+
+    assert len(free) == 0
+    assert sorted(drawn) == [(i, j) for i in range(n) for j in range(n)]
+
+    try:
+        free.draw(random)
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_draw_positions():
+    n = 10
+    for rng in [random, BlockRNG(3)]:
+        free = FreePositions(n, [(0, 0)])
+        positions = free.draw_positions(90, rng)
+
+        assert len(positions) == 90
+        assert len(set(positions)) == 90
+        assert (0, 0) not in positions
+        assert len(free) == 9
+        for position in positions:
+            assert position not in free
+        for location, cell in enumerate(free.cells):
+            assert free.index[cell] == location
+
+        try:
+            free.draw_positions(10, rng)
+            assert False
+        except ValueError:
+            assert True
+
+    # every free position is equally likely
+    counter = [0] * 4
+    for k in range(4000):
+        i, j = FreePositions(2).draw_positions(1, random)[0]
+        counter[i * 2 + j] += 1
+    for count in counter:
+        assert 850 < count < 1150
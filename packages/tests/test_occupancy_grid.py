@@ -0,0 +1,110 @@
+from packages.abm.agent import Agent
+from packages.abm.occupancy_grid import OccupancyGrid
+
+
+def test__init__():
+    n = 25
+    a1 = Agent((1, 1), 'I', mask=True, distancing=False)
+    a2 = Agent((24, 0), 'S', mask=True, distancing=False)
+
+    grid = OccupancyGrid(n, [a1, a2])
+    assert len(grid.cells) == n
+    assert len(grid.cells[0]) == n
+    assert grid.get_agent((1, 1)) is a1
+    assert grid.get_agent((24, 0)) is a2
+    assert grid.get_agent((0, 0)) is None
+
+
+def test_add_agent():
+    n = 25
+    grid = OccupancyGrid(n)
+    a1 = Agent((5, 5), 'I', mask=True, distancing=False)
+    a2 = Agent((5, 5), 'S', mask=True, distancing=False)
+
+    grid.add_agent(a1)
+    assert grid.get_agent((5, 5)) is a1
+
+    # adding same agent again is allowed
+    grid.add_agent(a1)
+
+    # position already occupied by another agent
+    try:
+        grid.add_agent(a2)
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_remove_agent():
+    n = 25
+    a1 = Agent((5, 5), 'I', mask=True, distancing=False)
+    a2 = Agent((5, 5), 'S', mask=True, distancing=False)
+    grid = OccupancyGrid(n, [a1])
+
+    # agent not in grid does not remove occupant
+    grid.remove_agent(a2)
+    assert grid.get_agent((5, 5)) is a1
+
+    grid.remove_agent(a1)
+    assert grid.get_agent((5, 5)) is None
+
+
+def test_move_agent():
+    n = 25
+    a1 = Agent((5, 5), 'I', mask=True, distancing=False)
+    grid = OccupancyGrid(n, [a1])
+
+    grid.move_agent(a1, (5, 6))
+    assert a1.position == (5, 6)
+    assert grid.get_agent((5, 5)) is None
+    assert grid.get_agent((5, 6)) is a1
+
+
+def test_get_agents():
+    n = 25
+    a1 = Agent((0, 0), 'I', mask=True, distancing=False)
+    a2 = Agent((24, 24), 'I', mask=True, distancing=False)
+    a3 = Agent((5, 5), 'I', mask=True, distancing=False)
+    grid = OccupancyGrid(n, [a1, a2, a3])
+
+    found = grid.get_agents({(0, 0), (24, 24), (1, 1)})
+    assert len(found) == 2
+    assert a1 in found and a2 in found
+
+
+def test_adjacent_counts():
+    n = 25
+    a1 = Agent((5, 5), 'I', mask=True, distancing=True)
+    a2 = Agent((5, 7), 'I', mask=True, distancing=False)
+    grid = OccupancyGrid(n, [a1, a2])
+
+    # position between both agents
+    assert grid.adjacent_agents[5][6] == 2
+    assert grid.adjacent_distancing[5][6] == 1
+
+    # position only adjacent to non-distancing agent
+    assert grid.adjacent_agents[5][8] == 1
+    assert grid.adjacent_distancing[5][8] == 0
+
+    # agent's own position is not adjacent to itself
+    assert grid.adjacent_agents[5][5] == 0
+
+    # counts follow agent when moved
+    grid.move_agent(a1, (4, 4))
+    assert grid.adjacent_agents[5][6] == 1
+    assert grid.adjacent_distancing[5][6] == 0
+    assert grid.adjacent_distancing[3][3] == 1
+
+    # counts cleared when removed
+    grid.remove_agent(a1)
+    grid.remove_agent(a2)
+    assert sum(sum(row) for row in grid.adjacent_agents) == 0
+    assert sum(sum(row) for row in grid.adjacent_distancing) == 0
+
+
+def test_get_adj_positions():
+    n = 25
+    grid = OccupancyGrid(n)
+
+    expected = {(24, 24), (24, 0), (24, 1), (0, 24), (0, 1), (1, 24), (1, 0), (1, 1)}
+    assert grid.get_adj_positions((0, 0)) == expected
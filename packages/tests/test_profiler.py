@@ -0,0 +1,34 @@
+from packages.abm.profiler import Profiler
+
+
+def test_add_time():
+    profiler = Profiler()
+    profiler.add_time('movement', 0.5)
+    profiler.add_time('movement', 0.25)
+    profiler.add_time('death_check', 0.25)
+
+    assert profiler.times == {'movement': 0.75, 'death_check': 0.25}
+
+
+def test_count():
+    profiler = Profiler()
+    profiler.count('no_legal_move')
+    profiler.count('no_legal_move', 3)
+
+    assert profiler.counters == {'no_legal_move': 4}
+
+
+def test_report():
+    profiler = Profiler()
+    assert profiler.report() == {'steps': 0, 'phases': {}, 'counters': {}}
+
+    profiler.add_time('movement', 3.0)
+    profiler.add_time('death_check', 1.0)
+    profiler.count('neighbor_checks', 8)
+    profiler.num_steps = 2
+
+    report = profiler.report()
+    assert report['steps'] == 2
+    assert report['phases']['movement'] == {'seconds': 3.0, 'per_step': 1.5, 'fraction': 0.75}
+    assert report['phases']['death_check']['fraction'] == 0.25
+    assert report['counters'] == {'neighbor_checks': 8}
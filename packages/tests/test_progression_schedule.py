@@ -0,0 +1,80 @@
+import numpy as np
+
+from packages.abm.agent import Agent
+from packages.abm.progression_schedule import ProgressionSchedule
+from packages.abm.rng import BlockRNG
+
+
+def test_add_infection():
+    schedule = ProgressionSchedule(BlockRNG(0))
+    symptomatic = Agent((0, 0), 'I', mask=False, distancing=False)
+    symptomatic.asymptomatic = False
+    asymptomatic = Agent((0, 1), 'I', mask=False, distancing=False)
+    asymptomatic.asymptomatic = True
+
+    schedule.add_infection(symptomatic, 2, death_step=-1)
+    schedule.add_infection(asymptomatic, 2, death_step=-1)
+
+    assert schedule.buckets[5] == [(symptomatic, 'Q')]
+    assert schedule.buckets[17] == [(symptomatic, 'R'), (asymptomatic, 'R')]
+    assert schedule.get_days_infected(symptomatic, 6) == 4
+
+
+def test_pop_events():
+    schedule = ProgressionSchedule(BlockRNG(0))
+    a1 = Agent((0, 0), 'I', mask=False, distancing=False)
+    a1.asymptomatic = False
+    a2 = Agent((0, 1), 'I', mask=False, distancing=False)
+    a2.asymptomatic = False
+    a3 = Agent((0, 2), 'I', mask=False, distancing=False)
+    a3.asymptomatic = False
+    schedule.add_infection(a1, 0, death_step=-1)
+    schedule.add_infection(a2, 0, death_step=-1)
+    schedule.add_infection(a3, 0, death_step=3)
+
+    assert schedule.pop_events(1) == {}
+    assert schedule.get_death_step(a3) == 3
+
+    # death takes precedence over quarantine
+    assert schedule.pop_events(3) == {a1: 'Q', a2: 'Q', a3: 'D'}
+    assert a3 not in schedule.infection_steps
+    assert 3 not in schedule.buckets
+
+    # events of removed agents are ignored
+    schedule.remove_agent(a2)
+    assert schedule.pop_events(15) == {a1: 'R'}
+    assert schedule.infection_steps == {}
+    assert schedule.get_days_infected(a1, 15) == 0
+
+
+def test_from_agents():
+    infected = Agent((0, 0), 'I', mask=False, distancing=False)
+    infected.asymptomatic = False
+    infected.days_infected = 1
+    quarantined = Agent((0, 1), 'Q', mask=False, distancing=False)
+    quarantined.days_infected = 5
+    recovered = Agent((0, 2), 'R', mask=False, distancing=False)
+
+    schedule = ProgressionSchedule.from_agents([infected, quarantined, recovered], 10, BlockRNG(0), [-1, 13, -1])
+
+    assert schedule.infection_steps == {infected: 9, quarantined: 5}
+    assert schedule.buckets == {12: [(infected, 'Q')], 24: [(infected, 'R')], 13: [(quarantined, 'D')],
+                                20: [(quarantined, 'R')]}
+
+    # deaths are drawn if not given, and only after the current step
+    schedule = ProgressionSchedule.from_agents([infected, quarantined, recovered], 10, BlockRNG(0))
+    for step in schedule.death_steps.values():
+        assert 10 < step <= 20
+
+
+def test_sample_death_delay():
+    schedule = ProgressionSchedule(BlockRNG(1))
+    num = 100000
+    delays = [schedule.sample_death_delay() for i in range(num)]
+    died = [delay for delay in delays if delay is not None]
+
+    # geometric distribution truncated at recovery
+    p = 1 - (1 - Agent.death_rate) ** ProgressionSchedule.recovery_delay
+    assert abs(len(died) / num - p) < 5 * np.sqrt(p * (1 - p) / num)
+    assert min(died) >= 1
+    assert max(died) <= ProgressionSchedule.recovery_delay
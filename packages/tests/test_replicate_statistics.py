@@ -0,0 +1,128 @@
+import numpy as np
+
+from packages.abm.counts import Counts
+from packages.abm.replicate_statistics import RunningStatistics, StreamingQuantiles
+
+
+def test_update():
+    rng = np.random.default_rng(0)
+    replicates = rng.integers(0, 250, size=(20, 11, 5))
+
+    statistics = RunningStatistics()
+    for counts in replicates:
+        statistics.update(counts)
+
+    assert statistics.count == 20
+    assert np.allclose(statistics.mean, replicates.mean(axis=0))
+    assert np.allclose(statistics.get_variance(), replicates.var(axis=0))
+    assert np.allclose(statistics.get_std(ddof=1), replicates.std(axis=0, ddof=1))
+
+    # from Counts buffer
+    buffer = Counts()
+    for row in replicates[0]:
+        buffer.append(row)
+    statistics = RunningStatistics()
+    statistics.update(buffer)
+    assert np.array_equal(statistics.mean, replicates[0])
+
+    # wrong shape
+    try:
+        statistics.update(replicates[0, :5])
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_update_batch():
+    rng = np.random.default_rng(1)
+    replicates = rng.integers(0, 250, size=(23, 11, 5))
+
+    statistics = RunningStatistics()
+    statistics.update_batch(replicates[:0])
+    assert statistics.count == 0
+
+    for i in range(0, 23, 5):
+        statistics.update_batch(replicates[i:i + 5])
+
+    assert statistics.count == 23
+    assert np.allclose(statistics.mean, replicates.mean(axis=0))
+    assert np.allclose(statistics.get_variance(), replicates.var(axis=0))
+
+
+def test_merge():
+    rng = np.random.default_rng(2)
+    replicates = rng.integers(0, 250, size=(10, 4, 5))
+
+    first = RunningStatistics()
+    second = RunningStatistics()
+    for counts in replicates[:3]:
+        first.update(counts)
+    for counts in replicates[3:]:
+        second.update(counts)
+
+    first.merge(second)
+    first.merge(RunningStatistics())
+    assert first.count == 10
+    assert np.allclose(first.mean, replicates.mean(axis=0))
+    assert np.allclose(first.get_variance(), replicates.var(axis=0))
+
+
+def test_get_metrics():
+    statistics = RunningStatistics()
+    statistics.update([[1, 2, 3, 4, 5]])
+    statistics.update([[3, 2, 5, 4, 7]])
+
+    metrics = statistics.get_metrics(0)
+    assert [status for status, mean, std in metrics] == ['R', 'S', 'I', 'Q', 'D']
+    assert metrics[0] == ('R', 2.0, 1.0)
+    assert metrics[4] == ('D', 2.0, 0.0)
+
+    # not enough replicates for a sample variance
+    statistics = RunningStatistics()
+    statistics.update([[1, 2, 3, 4, 5]])
+    try:
+        statistics.get_variance(ddof=1)
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_streaming_quantiles():
+    rng = np.random.default_rng(0)
+    replicates = rng.normal(rng.uniform(0, 200, size=(11, 5)), 20, size=(2000, 11, 5))
+
+    quantiles = StreamingQuantiles()
+    quantiles.update_batch(replicates)
+
+    assert quantiles.count == 2000
+    estimates = quantiles.get_quantiles()
+    expected = np.quantile(replicates, [0.05, 0.5, 0.95], axis=0)
+    assert estimates.shape == (3, 11, 5)
+    assert np.abs(estimates - expected).mean() < 0.05 * 20
+    assert np.abs(estimates - expected).max() < 0.5 * 20
+
+
+def test_streaming_quantiles_few_replicates():
+    rng = np.random.default_rng(1)
+    replicates = rng.integers(0, 250, size=(4, 11, 5))
+
+    quantiles = StreamingQuantiles((0.25, 0.5))
+    for counts in replicates:
+        quantiles.update(counts)
+
+    # exact until markers are initialized
+    assert np.allclose(quantiles.get_quantiles(), np.quantile(replicates, [0.25, 0.5], axis=0))
+
+    # wrong shape
+    try:
+        quantiles.update(replicates[0, :5])
+        assert False
+    except ValueError:
+        pass
+
+    # invalid probabilities
+    try:
+        StreamingQuantiles((0.5, 1.0))
+        assert False
+    except ValueError:
+        pass
@@ -0,0 +1,173 @@
+import numpy as np
+
+from packages.abm.abm import ABM
+from packages.abm import replicates
+from packages.abm.counts import Counts
+from packages.abm.replicates import counts_to_array, get_replicate_seeds, iter_replicates, run_replicates, \
+    summarize_replicates
+from packages.abm.replicate_statistics import StreamingQuantiles
+from packages.abm.results_cache import ResultsCache
+from packages.abm.vectorized_abm import VectorizedABM
+
+
+def test_counts_to_array():
+    counts = [{'R': 1, 'D': 2, 'I': 3, 'S': 4, 'Q': 5},
+              {'R': 6, 'D': 7, 'I': 8, 'S': 9, 'Q': 10}]
+    result = counts_to_array(counts)
+
+    assert result.shape == (2, 5)
+    assert list(result[0]) == [1, 2, 3, 4, 5]
+    assert list(result[1]) == [6, 7, 8, 9, 10]
+
+    # from Counts buffer
+    buffer = Counts()
+    for each in counts:
+        buffer.append([each[status] for status in Counts.statuses])
+    assert np.array_equal(counts_to_array(buffer), result)
+
+
+def test_get_replicate_seeds():
+    seeds_1 = get_replicate_seeds(1, 3)
+    seeds_2 = get_replicate_seeds(1, 3)
+
+    assert len(seeds_1) == 3
+    for s1, s2 in zip(seeds_1, seeds_2):
+        assert np.array_equal(s1.generate_state(2), s2.generate_state(2))
+
+    # replicates get different seeds
+    assert not np.array_equal(seeds_1[0].generate_state(2), seeds_1[1].generate_state(2))
+
+    # same as spawning from a fresh seed, and a SeedSequence can be reused
+    expected = np.random.SeedSequence(1).spawn(3)
+    root = np.random.SeedSequence(1)
+    for i in range(2):
+        seeds = get_replicate_seeds(root, 3)
+        for s1, s2 in zip(seeds, expected):
+            assert np.array_equal(s1.generate_state(2), s2.generate_state(2))
+    assert root.n_children_spawned == 0
+
+
+def test_iter_replicates():
+    chunks = list(iter_replicates(5, 3, 10, 20, 2, 0.1, 0.3, seed=1, num_workers=1, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    for chunk in chunks:
+        assert chunk.shape[1:] == (4, 5)
+        assert np.all(chunk.sum(axis=2) == 20)  # every agent counted once
+
+
+def test_run_replicates():
+    n = 10
+    m = 50
+    results = run_replicates(4, 20, n, m, 5, 0.1, 0.3, seed=7, num_workers=1)
+
+    assert results.shape == (4, 21, 5)
+    assert results.dtype == np.int32
+    assert np.all(results[:, 0, Counts.columns['I']] == 5)
+
+    # same seed gives same results regardless of workers or chunks
+    parallel = run_replicates(4, 20, n, m, 5, 0.1, 0.3, seed=7, num_workers=2, chunk_size=1)
+    assert np.array_equal(results, parallel)
+
+    # different seed gives different results
+    other = run_replicates(4, 20, n, m, 5, 0.1, 0.3, seed=8, num_workers=1)
+    assert not np.array_equal(results, other)
+
+    # empty
+    assert run_replicates(0, 20, n, m, 5, 0.1, 0.3, num_workers=1).shape == (0, 21, 5)
+
+
+def test_run_replicates_matches_model():
+    seeds = get_replicate_seeds(11, 2)
+    results = run_replicates(2, 15, 10, 40, 3, 0.1, 0.3, seed=11, num_workers=2)
+
+    # each replicate matches a model built directly from its seed
+    for i in range(2):
+        abm = ABM(10, 40, 3, 0.1, 0.3, seed=seeds[i])
+        assert np.array_equal(results[i], abm.run_simulation(15).array)
+
+
+def test_run_replicates_vectorized():
+    results = run_replicates(3, 10, 10, 20, 2, 0.1, 0.3, seed=3, num_workers=2, engine=VectorizedABM)
+    serial = run_replicates(3, 10, 10, 20, 2, 0.1, 0.3, seed=3, num_workers=1, engine=VectorizedABM)
+
+    assert results.shape == (3, 11, 5)
+    assert np.array_equal(results, serial)
+
+
+def test_run_replicates_cache(tmp_path, monkeypatch):
+    cache = ResultsCache(tmp_path)
+    args = (6, 12, 10, 40, 3, 0.1, 0.3, 0.1)
+
+    expected = run_replicates(*args, seed=3, num_workers=1)
+    first = run_replicates(*args, seed=3, num_workers=1, chunk_size=4, cache=cache)
+    assert np.array_equal(first, expected)
+    assert len(cache.get_entries()) == 6  # one for each replicate
+
+    # repeated request is read from the cache without running any replicates
+    def fail(*args):
+        raise AssertionError('replicate was run')
+
+    monkeypatch.setattr(replicates, 'run_replicate_chunk', fail)
+    second = run_replicates(*args, seed=3, num_workers=1, chunk_size=5, cache=cache)
+    assert np.array_equal(second, expected)
+    assert [len(chunk) for chunk in iter_replicates(*args, seed=3, num_workers=1, chunk_size=5, cache=cache)] == [5, 1]
+
+    # fewer replicates from the same root seed are read from the cache
+    fewer = run_replicates(4, *args[1:], seed=3, num_workers=1, cache=cache)
+    assert np.array_equal(fewer, expected[:4])
+
+    # more replicates only run those missing from the cache
+    monkeypatch.undo()
+    run_seeds = []
+    run_replicate_chunk = replicates.run_replicate_chunk
+
+    def counting_run_replicate_chunk(engine, model_args, num_steps, seeds):
+        run_seeds.extend(seeds)
+        return run_replicate_chunk(engine, model_args, num_steps, seeds)
+
+    monkeypatch.setattr(replicates, 'run_replicate_chunk', counting_run_replicate_chunk)
+    more = run_replicates(10, *args[1:], seed=3, num_workers=1, chunk_size=3, cache=cache)
+    assert [each.spawn_key for each in run_seeds] == [(i,) for i in range(6, 10)]
+    assert np.array_equal(more, run_replicates(10, *args[1:], seed=3, num_workers=1))
+    assert len(cache.get_entries()) == 10
+
+    # runs without a seed are not cached
+    monkeypatch.undo()
+    run_replicates(*args, num_workers=1, cache=cache)
+    assert len(cache.get_entries()) == 10
+
+
+def test_run_replicates_cache_seed_sequence(tmp_path):
+    cache = ResultsCache(tmp_path)
+    args = (4, 10, 10, 40, 3, 0.1, 0.3, 0.1)
+    seed = np.random.SeedSequence(5)
+
+    # the same SeedSequence gives the same results, with or without the cache
+    expected = run_replicates(*args, seed=seed, num_workers=1)
+    assert np.array_equal(run_replicates(*args, seed=seed, num_workers=1, cache=cache), expected)
+    assert np.array_equal(run_replicates(*args, seed=seed, num_workers=1, cache=cache), expected)
+    assert np.array_equal(run_replicates(*args, seed=seed, num_workers=1), expected)
+    assert len(cache.get_entries()) == 4
+
+
+def test_summarize_replicates():
+    args = (7, 12, 10, 40, 3, 0.1, 0.3, 0.1)
+    results = run_replicates(*args, seed=4, num_workers=1)
+    statistics = summarize_replicates(*args, seed=4, num_workers=1, chunk_size=3)
+
+    assert statistics.count == 7
+    assert np.allclose(statistics.mean, results.mean(axis=0))
+    assert np.allclose(statistics.get_std(), results.std(axis=0))
+
+
+def test_summarize_replicates_aggregators():
+    args = (7, 12, 10, 40, 3, 0.1, 0.3, 0.1)
+    results = run_replicates(*args, seed=4, num_workers=1)
+    quantiles = StreamingQuantiles()
+    summarize_replicates(*args, seed=4, num_workers=1, chunk_size=3, aggregators=[quantiles])
+
+    assert quantiles.count == 7
+    assert quantiles.get_quantiles().shape == (3, 13, 5)
+    assert (quantiles.get_quantiles() >= results.min(axis=0)).all()
+    assert (quantiles.get_quantiles() <= results.max(axis=0)).all()
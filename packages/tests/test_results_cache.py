@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+
+from packages.abm.abm import ABM
+from packages.abm.results_cache import ResultsCache, get_code_version
+from packages.abm.vectorized_abm import VectorizedABM
+
+
+def test_get_code_version():
+    assert get_code_version() == get_code_version()
+    assert len(get_code_version()) == 64
+
+
+def test_get_key(tmp_path):
+    cache = ResultsCache(tmp_path, code_version='a')
+    parameters = {'model_args': [25, 250, 10, 0.1, 0.35, 0.0], 'num_steps': 10}
+
+    key = cache.get_key(ABM, parameters, 5)
+    assert key == cache.get_key(ABM, dict(parameters), np.random.SeedSequence(5))
+
+    # anything which changes the results changes the key
+    assert key != cache.get_key(VectorizedABM, parameters, 5)
+    assert key != cache.get_key(ABM, dict(parameters, num_steps=11), 5)
+    assert key != cache.get_key(ABM, parameters, 6)
+    assert key != cache.get_key(ABM, parameters, np.random.SeedSequence(5).spawn(1)[0])
+    assert key != ResultsCache(tmp_path, code_version='b').get_key(ABM, parameters, 5)
+
+    # fresh entropy is never cached
+    assert cache.get_key(ABM, parameters, None) is None
+
+
+def test_get_put(tmp_path):
+    cache = ResultsCache(tmp_path)
+    results = np.arange(30, dtype=np.int32).reshape(2, 3, 5)
+
+    assert cache.get('missing') is None
+
+    cache.put('key', results)
+    assert np.array_equal(cache.get('key'), results)
+    assert cache.get('key').dtype == np.int32
+    assert os.listdir(tmp_path) == ['key.npy']
+
+
+def test_evict(tmp_path):
+    cache = ResultsCache(tmp_path)
+    results = np.zeros(1000, dtype=np.int32)
+
+    for key in ['a', 'b', 'c']:
+        cache.put(key, results)
+    size = os.path.getsize(cache.get_path('a'))
+    cache.max_bytes = 3 * size
+
+    os.utime(cache.get_path('a'), ns=(1, 1))
+    os.utime(cache.get_path('b'), ns=(2, 2))
+    os.utime(cache.get_path('c'), ns=(3, 3))
+
+    # reading a marks it as recently used, so b is evicted first
+    cache.get('a')
+    cache.put('d', results)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.get('d') is not None
+    assert cache.get_size() == 3 * size
@@ -0,0 +1,92 @@
+import copy
+import pickle
+import random
+
+import numpy as np
+
+from packages.abm.agent import Agent
+from packages.abm.agent_mover import AgentMover
+from packages.abm.rng import BlockRNG
+
+
+def test__init__():
+    # from seed
+    rng_1 = BlockRNG(5)
+    rng_2 = BlockRNG(np.random.default_rng(5))
+    assert [rng_1.random() for i in range(10)] == [rng_2.random() for i in range(10)]
+
+    # different seeds
+    rng_3 = BlockRNG(6)
+    assert rng_1.random() != rng_3.random()
+
+
+def test_random():
+    rng = BlockRNG(1, block_size=16)
+
+    # values continue across blocks and match the generator
+    values = [rng.random() for i in range(100)]
+    expected = np.random.default_rng(1)
+    expected = np.concatenate([expected.random(16) for i in range(7)])[:100]
+    assert np.array_equal(values, expected)
+
+    for u in values:
+        assert 0 <= u < 1
+
+
+def test_randint():
+    rng = BlockRNG(2)
+    num = 100000
+    counter = 0
+    for i in range(num):
+        value = rng.randint(1, 4)
+        assert 1 <= value <= 4
+        if value == 1:
+            counter += 1
+    assert round(counter / num, 2) == 0.25
+
+
+def test_get_state():
+    rng = BlockRNG(3, block_size=16)
+    for i in range(20):
+        rng.random()
+
+    state = rng.get_state()
+    expected = [rng.random() for i in range(50)]
+
+    # restore into same provider
+    rng.set_state(state)
+    assert [rng.random() for i in range(50)] == expected
+
+    # restore into new provider
+    other = BlockRNG(99, block_size=16)
+    other.set_state(state)
+    assert [other.random() for i in range(50)] == expected
+
+
+def test_copy():
+    rng = BlockRNG(3, block_size=16)
+    for i in range(20):
+        rng.random()
+
+    # copies continue the same sequence, independently of the original
+    copied = copy.deepcopy(rng)
+    unpickled = pickle.loads(pickle.dumps(rng))
+    expected = [rng.random() for i in range(50)]
+    assert [copied.random() for i in range(50)] == expected
+    assert [unpickled.random() for i in range(50)] == expected
+    assert unpickled.block_size == 16
+
+
+def test_does_not_use_global_random(monkeypatch):
+    rng = BlockRNG(4)
+    monkeypatch.setattr(Agent, 'rng', rng)
+    a1 = Agent((1, 1), 'S', mask=False, distancing=False, rng=rng)
+    a2 = Agent((1, 2), 'I', mask=False, distancing=False, rng=rng)
+    am = AgentMover(25, rng=rng)
+
+    state = random.getstate()
+    for i in range(100):
+        a1.is_infected([a2])
+        a2.has_died()
+        am.move_agent(a1, [(0, 0), (0, 1)])
+    assert random.getstate() == state
@@ -0,0 +1,196 @@
+import numpy as np
+
+from packages.abm.agent_mover import AgentMover
+from packages.abm.profiler import Profiler
+from packages.abm.vectorized_abm import VectorizedABM
+
+
+def test__init__():
+    # raises exception
+    try:
+        VectorizedABM(3, 250, 10, 0.25, 0.35, 0.1)
+        assert False
+    except ValueError:
+        assert True
+
+    n = 25
+    m = 250
+    abm = VectorizedABM(n, m, 10, 0.25, 0.35, 0.1)
+
+    assert len(abm.status) == m
+    assert abm.mask.sum() == 88  # int(round(0.35 * 250))
+    assert abm.distancing.sum() == 62
+
+    # every agent placed on its own position
+    assert (abm.occupant >= 0).sum() == m
+    assert np.array_equal(abm.occupant[abm.x, abm.y], np.arange(m))
+
+    # same arguments as ABM; profiling does not change results
+    profiler = Profiler()
+    counts_1 = VectorizedABM(10, 40, 3, 0.1, 0.3, 0.1, seed=5, profiler=profiler, progression='sweep')
+    counts_2 = VectorizedABM(10, 40, 3, 0.1, 0.3, 0.1, seed=5)
+    assert np.array_equal(counts_1.run_simulation(10, track_movement=True).array,
+                          counts_2.run_simulation(10, track_movement=True).array)
+
+    report = profiler.report()
+    assert report['steps'] == 10
+    assert list(report['phases']) == ['death_check', 'infection', 'progression', 'movement']
+
+    try:
+        VectorizedABM(n, m, 10, 0.25, 0.35, 0.1, progression='daily')
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_seed():
+    counts_1 = VectorizedABM(10, 40, 3, 0.1, 0.3, 0.1, seed=5).run_simulation(30)
+    counts_2 = VectorizedABM(10, 40, 3, 0.1, 0.3, 0.1, seed=5).run_simulation(30)
+    assert np.array_equal(counts_1.array, counts_2.array)
+
+
+def test_get_counts():
+    abm = VectorizedABM(25, 250, 10, 0.25, 0.35, 0.1)
+
+    counts = abm.get_counts()
+    assert list(counts.keys()) == ['R', 'D', 'I', 'S', 'Q']
+    assert counts['R'] == 25
+    assert counts['I'] == 10
+    assert counts['S'] == 250 - 25 - 10
+    assert counts['D'] == 0
+    assert counts['Q'] == 0
+
+
+def test_find_new_infections():
+    abm = VectorizedABM(25, 2, 1, 0.0, 0.0)
+
+    # one susceptible agent next to one infected agent
+    abm.occupant[:, :] = -1
+    abm.x[:] = [5, 5]
+    abm.y[:] = [5, 6]
+    abm.occupant[5, 5] = 0
+    abm.occupant[5, 6] = 1
+    abm.status[:] = [abm.I, abm.S]
+
+    num = 20000
+    for masks, rate in [([False, False], 0.25), ([True, False], 0.01), ([False, True], 0.01)]:
+        abm.mask[:] = masks
+        counter = 0
+        for i in range(num):
+            counter += len(abm.find_new_infections())
+        tolerance = 5 * (rate * (1 - rate) / num) ** 0.5  # 5 standard deviations
+        assert abs(counter / num - rate) < tolerance, str(masks) + ' ' + str(counter / num)
+
+    # no infection from recovered agent
+    abm.status[:] = [abm.R, abm.S]
+    assert len(abm.find_new_infections()) == 0
+
+
+def test_progress_infections():
+    abm = VectorizedABM(25, 3, 3, 0.0, 0.0)
+    abm.asymptomatic[:] = [False, True, False]
+    abm.days_infected[:] = [2, 2, 14]
+
+    abm.progress_infections()
+    assert list(abm.status) == [abm.Q, abm.I, abm.R]
+    assert list(abm.days_infected) == [3, 3, 0]
+
+
+def test_move_all_agents():
+    n = 25
+    abm = VectorizedABM(n, 250, 10, 0.2, 0.35, 0.1)
+    am = AgentMover(n)
+
+    for i in range(10):
+        abm.move_all_agents()
+
+    # no two agents share a position
+    assert np.array_equal(abm.occupant[abm.x, abm.y], np.arange(250))
+
+    # no agent is adjacent to a distancing agent
+    for index in np.flatnonzero(abm.distancing):
+        for pos in am.get_adj_positions((abm.x[index], abm.y[index])):
+            assert abm.occupant[pos] < 0
+
+
+def test_move_all_agents_checkerboard():
+    n = 25
+    m = 250
+    abm = VectorizedABM(n, m, 10, 0.2, 0.35, 0.1, movement='checkerboard')
+    am = AgentMover(n)
+
+    x_before = abm.x.copy()
+    for i in range(10):
+        abm.move_all_agents()
+
+    assert not np.array_equal(abm.x, x_before)
+
+    # no two agents share a position
+    assert np.array_equal(abm.occupant[abm.x, abm.y], np.arange(m))
+    assert (abm.occupant >= 0).sum() == m
+
+    # no agent is adjacent to a distancing agent
+    for index in np.flatnonzero(abm.distancing):
+        for pos in am.get_adj_positions((abm.x[index], abm.y[index])):
+            assert abm.occupant[pos] < 0
+
+    # invalid mode
+    try:
+        VectorizedABM(n, m, 10, 0.2, 0.35, 0.1, movement='diagonal')
+        assert False
+    except ValueError:
+        assert True
+
+
+def test_run_simulation():
+    n = 25
+    m = 250
+    abm = VectorizedABM(n, m, 10, 0.1, 0.35, 0.1)
+    counts = abm.run_simulation(100)
+
+    assert len(counts) == 101  # one additional for initialization
+    for count_dict in counts:
+        assert sum(count_dict.values()) == m
+    assert counts[-1]['D'] == m - abm.alive.sum()
+
+
+def test_run_simulation_extinct():
+    abm = VectorizedABM(10, 30, 1, 0.1, 0.3, seed=0)
+    counts = abm.run_simulation(60)
+
+    assert len(counts) == 61
+    assert abm.current_step == 60
+    assert abm.is_extinct()
+
+    # same counts when every step is run
+    other = VectorizedABM(10, 30, 1, 0.1, 0.3, seed=0)
+    assert np.array_equal(other.run_simulation(60, track_movement=True).array, counts.array)
+
+    # no further movement once extinct
+    x = abm.x.copy()
+    y = abm.y.copy()
+    abm.run_simulation(5)
+    assert np.array_equal(abm.x, x) and np.array_equal(abm.y, y)
+    assert len(abm.counts) == 66
+
+
+def test_iter_steps():
+    m = 250
+    abm = VectorizedABM(25, m, 10, 0.1, 0.35, 0.1, seed=4)
+    snapshots = list(abm.iter_steps(20, track_changes=True))
+
+    assert [snapshot.step for snapshot in snapshots] == list(range(21))
+    for snapshot in snapshots:
+        assert sum(snapshot.counts.values()) == m
+    for previous, snapshot in zip(snapshots, snapshots[1:]):
+        if previous.counts['I'] != snapshot.counts['I']:
+            assert len(snapshot.changed) > 0
+
+    counts = VectorizedABM(25, m, 10, 0.1, 0.35, 0.1, seed=4).run_simulation(20)
+    assert [dict(row) for row in counts] == [dict(snapshot.counts) for snapshot in snapshots]
+
+    # the initial state is only recorded once, even if no steps are run
+    abm = VectorizedABM(25, m, 10, 0.1, 0.35, 0.1, seed=4)
+    assert len(abm.run_simulation(0)) == 1
+    assert len(abm.run_simulation(5)) == 6
+    assert [dict(row) for row in abm.counts] == [dict(row) for row in counts][:6]